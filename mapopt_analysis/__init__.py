@@ -10,12 +10,18 @@ __version__ = "1.0.0"
 __author__ = "Subrat Bastola"
 __email__ = "subratbastola@gmail.com"
 
-from .core.data_loader import DataLoader
-from .core.signal_processing import SignalProcessor
-from .core.mapopt_calculator import MAPoptCalculator
-from .core.burden_metrics import BurdenCalculator
-from .visualization.plots import PlotManager
-from .utils.file_io import FileManager
+import importlib
+
+# Public classes are imported on first access (PEP 562), so `--version`,
+# `--help` and the CLI do not pay for modules they never use
+_EXPORTS = {
+    "DataLoader": ".core.data_loader",
+    "SignalProcessor": ".core.signal_processing",
+    "MAPoptCalculator": ".core.mapopt_calculator",
+    "BurdenCalculator": ".core.burden_metrics",
+    "PlotManager": ".visualization.plots",
+    "FileManager": ".utils.file_io",
+}
 
 __all__ = [
     "DataLoader",
@@ -24,4 +30,10 @@ __all__ = [
     "BurdenCalculator",
     "PlotManager",
     "FileManager"
-]
\ No newline at end of file
+]
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        return getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
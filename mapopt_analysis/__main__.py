@@ -0,0 +1,8 @@
+"""
+Run the MAPopt Analysis Tool with `python -m mapopt_analysis`
+"""
+
+from .main import main
+
+if __name__ == "__main__":
+    main()
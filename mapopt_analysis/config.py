@@ -29,14 +29,21 @@ ROLLING_WINDOW_SIZE = 5
 SAVGOL_WINDOW = 11
 SAVGOL_ORDER = 3
 
-# Parallel Processing
-MAX_CORES = 8
-CHUNK_SIZE = 25
+# Preprocessed data cache: off unless set to a directory, e.g.
+# os.path.join(os.path.expanduser("~"), ".mapopt_cache")
+CACHE_DIR = None
+CACHE_MAX_FILES = 20  # Oldest entries are removed beyond this count
+
+# Batch Processing
+CHUNK_SIZE = 250  # Time points fitted per vectorized batch
 
 # GUI Settings
 WINDOW_TITLE = "MAPopt Analysis Tool - v1.0"
 WINDOW_SIZE = "1400x900"
 PLOT_DPI = 300
+LOG_FLUSH_MS = 50  # Interval for writing queued log lines to the results pane
+LOG_MAX_LINES = 5000  # Older lines are dropped from the results pane
+BURDEN_DEBOUNCE_MS = 250  # Idle time after a time-range edit before burden is recalculated
 
 # File Extensions
 SUPPORTED_EXTENSIONS = [".csv", ".txt"]
@@ -5,10 +5,15 @@ Burden metrics calculation module for MAPopt Analysis
 
 import numpy as np
 import pandas as pd
-from typing import Dict, Tuple
+from scipy.integrate import cumulative_trapezoid
+from typing import Dict, Tuple, Optional
 
 from ..config import BURDEN_BOUNDS, DEVIATION_MIN, DEVIATION_MAX
 
+# Bits of BurdenCalculator.bounds_flags
+OUTSIDE_UPPER = 1
+OUTSIDE_LOWER = 2
+
 
 class BurdenCalculator:
     """Calculates deviation and burden metrics from MAPopt analysis"""
@@ -17,12 +22,16 @@ class BurdenCalculator:
         self.deviation = None
         self.lower_bound = None
         self.upper_bound = None
-        self.outside_upper = None
-        self.outside_lower = None
-        self.outside_bounds = None
+        self.bounds_flags = None
         self.excess_above = None
         self.excess_below = None
         
+        # Running integrals and counts for O(1) per-window burden
+        self._cum_outside = None
+        self._cum_safe = None
+        self._cum_safe_nonfinite = None
+        self._cum_outside_count = None
+        
     def calculate_deviation_and_burden(
         self, 
         data: pd.DataFrame,
@@ -40,22 +49,58 @@ class BurdenCalculator:
         # Interpolate MAP to time vector
         map_interp = np.interp(time_vector, data['time'], data['MAP'])
         
-        # Calculate deviation
-        self.deviation = map_interp - mapopt_filled
-        self.deviation = np.clip(self.deviation, DEVIATION_MIN, DEVIATION_MAX)
+        # Calculate deviation (clipped in place)
+        self.deviation = np.subtract(map_interp, mapopt_filled)
+        np.clip(self.deviation, DEVIATION_MIN, DEVIATION_MAX, out=self.deviation)
         
         # Define bounds
         self.lower_bound = mapopt_filled - BURDEN_BOUNDS
         self.upper_bound = mapopt_filled + BURDEN_BOUNDS
         
-        # Calculate periods outside bounds
-        self.outside_upper = map_interp > self.upper_bound
-        self.outside_lower = map_interp < self.lower_bound
-        self.outside_bounds = self.outside_upper | self.outside_lower
+        # Calculate excess deviations; fmax maps non-positive and NaN excess to 0
+        self.excess_above = np.subtract(map_interp, self.upper_bound)
+        np.fmax(self.excess_above, 0, out=self.excess_above)
+        self.excess_below = np.subtract(self.lower_bound, map_interp)
+        np.fmax(self.excess_below, 0, out=self.excess_below)
+        
+        # Calculate periods outside bounds (a > b exactly when a - b > 0), packed
+        # one byte per sample: OUTSIDE_UPPER and OUTSIDE_LOWER bits
+        self.bounds_flags = (self.excess_above > 0).view(np.uint8)
+        self.bounds_flags |= (self.excess_below > 0).view(np.uint8) << 1
+        
+        # Precompute running integrals so any window reduces to two lookups.
+        # Excess is always finite; the safe zone is NaN wherever MAPopt is, so it
+        # is zero-filled there (one NaN would otherwise poison every later window)
+        # and a prefix count marks the windows that contain such samples
+        self._cum_outside = cumulative_trapezoid(
+            self.excess_above + self.excess_below, time_vector, initial=0
+        )
+        safe_width = self.upper_bound - self.lower_bound
+        nonfinite = ~np.isfinite(safe_width)
+        self._cum_safe = cumulative_trapezoid(
+            np.where(nonfinite, 0.0, safe_width), time_vector, initial=0
+        )
+        self._cum_safe_nonfinite = np.concatenate(
+            ([0], np.cumsum(nonfinite, dtype=np.int64))
+        )
+        self._cum_outside_count = np.concatenate(
+            ([0], np.cumsum(self.bounds_flags != 0, dtype=np.int64))
+        )
+        
+    @property
+    def outside_upper(self) -> Optional[np.ndarray]:
+        """Boolean mask of samples above the upper bound"""
+        return None if self.bounds_flags is None else (self.bounds_flags & OUTSIDE_UPPER) != 0
         
-        # Calculate excess deviations
-        self.excess_above = np.where(self.outside_upper, map_interp - self.upper_bound, 0)
-        self.excess_below = np.where(self.outside_lower, self.lower_bound - map_interp, 0)
+    @property
+    def outside_lower(self) -> Optional[np.ndarray]:
+        """Boolean mask of samples below the lower bound"""
+        return None if self.bounds_flags is None else (self.bounds_flags & OUTSIDE_LOWER) != 0
+        
+    @property
+    def outside_bounds(self) -> Optional[np.ndarray]:
+        """Boolean mask of samples outside either bound"""
+        return None if self.bounds_flags is None else self.bounds_flags != 0
         
     def calculate_burden_metrics(
         self, 
@@ -74,17 +119,17 @@ class BurdenCalculator:
         Returns:
             Dictionary with burden metrics
         """
-        if self.outside_bounds is None:
+        if self.bounds_flags is None:
             raise ValueError("Must call calculate_deviation_and_burden first")
             
         # Validate and adjust bounds
         t_start_hr = max(t_start_hr, time_vector[0])
         t_end_hr = min(t_end_hr, time_vector[-1])
         
-        # Find indices for time period
-        time_idx = (time_vector >= t_start_hr) & (time_vector <= t_end_hr)
+        # Find indices for time period [i_start, i_end]
+        i_start, i_end = self._window_indices(time_vector, t_start_hr, t_end_hr)
         
-        if not np.any(time_idx):
+        if i_end < i_start:
             return {
                 't_start_hr': t_start_hr,
                 't_end_hr': t_end_hr,
@@ -93,10 +138,11 @@ class BurdenCalculator:
             }
         
         # Calculate time burden (percentage of time outside bounds)
-        time_burden = np.sum(self.outside_bounds[time_idx]) / np.sum(time_idx) * 100
+        num_outside = self._cum_outside_count[i_end + 1] - self._cum_outside_count[i_start]
+        time_burden = num_outside / (i_end + 1 - i_start) * 100
         
         # Calculate area burden
-        area_burden_ratio = self._calculate_area_burden(time_vector, time_idx)
+        area_burden_ratio = self._calculate_area_burden(i_start, i_end)
         
         return {
             't_start_hr': t_start_hr,
@@ -105,23 +151,22 @@ class BurdenCalculator:
             'area_burden_ratio': area_burden_ratio
         }
         
-    def _calculate_area_burden(
-        self, 
-        time_vector: np.ndarray, 
-        time_idx: np.ndarray
-    ) -> float:
-        """Calculate area burden ratio"""
+    @staticmethod
+    def _window_indices(time_vector: np.ndarray, t_start_hr, t_end_hr):
+        """First and last (inclusive) indices of time_vector within [t_start_hr, t_end_hr]"""
+        i_start = np.searchsorted(time_vector, t_start_hr, side='left')
+        i_end = np.searchsorted(time_vector, t_end_hr, side='right') - 1
+        return i_start, i_end
+        
+    def _calculate_area_burden(self, i_start: int, i_end: int) -> float:
+        """Calculate area burden ratio over samples i_start..i_end (inclusive)"""
         # Area outside safe zone
-        area_outside = np.trapz(
-            (self.excess_above[time_idx] + self.excess_below[time_idx]),
-            time_vector[time_idx]
-        )
+        area_outside = self._cum_outside[i_end] - self._cum_outside[i_start]
         
-        # Total safe zone area
-        area_safe_zone = np.trapz(
-            (self.upper_bound[time_idx] - self.lower_bound[time_idx]),
-            time_vector[time_idx]
-        )
+        # Total safe zone area; undefined (reported as 0) if any sample lacks MAPopt
+        if self._cum_safe_nonfinite[i_end + 1] - self._cum_safe_nonfinite[i_start] > 0:
+            return 0.0
+        area_safe_zone = self._cum_safe[i_end] - self._cum_safe[i_start]
         
         if area_safe_zone > 0:
             return (area_outside / area_safe_zone) * 100
@@ -133,14 +178,20 @@ class BurdenCalculator:
         if self.deviation is None:
             return {}
             
+        # Reuse the mean for the standard deviation (same arithmetic as np.std)
+        n = len(self.deviation)
+        mean_deviation = np.mean(self.deviation)
+        std_deviation = np.sqrt(np.mean(np.square(self.deviation - mean_deviation)))
+        
+        # Percentages from mask counts; the outside count is already accumulated
         return {
-            'mean_deviation': np.mean(self.deviation),
-            'std_deviation': np.std(self.deviation),
+            'mean_deviation': mean_deviation,
+            'std_deviation': std_deviation,
             'max_positive_deviation': np.max(self.deviation),
             'max_negative_deviation': np.min(self.deviation),
-            'percent_time_above_bounds': np.mean(self.outside_upper) * 100,
-            'percent_time_below_bounds': np.mean(self.outside_lower) * 100,
-            'percent_time_outside_bounds': np.mean(self.outside_bounds) * 100
+            'percent_time_above_bounds': np.count_nonzero(self.outside_upper) / n * 100,
+            'percent_time_below_bounds': np.count_nonzero(self.outside_lower) / n * 100,
+            'percent_time_outside_bounds': self._cum_outside_count[-1] / n * 100
         }
         
     def calculate_burden_over_time(
@@ -160,31 +211,33 @@ class BurdenCalculator:
         Returns:
             Tuple of (time_centers, burden_values)
         """
-        if self.outside_bounds is None:
+        if self.bounds_flags is None:
             raise ValueError("Must call calculate_deviation_and_burden first")
             
         start_time = time_vector[0]
         end_time = time_vector[-1] - window_hours
         
-        time_centers = []
-        burden_values = []
-        
-        current_time = start_time
-        while current_time <= end_time:
-            window_start = current_time
-            window_end = current_time + window_hours
-            
-            # Calculate burden for this window
-            burden_result = self.calculate_burden_metrics(
-                time_vector, window_start, window_end
-            )
-            
-            time_centers.append(current_time + window_hours / 2)
-            burden_values.append(burden_result['time_burden'])
+        if end_time < start_time:
+            return np.array([]), np.array([])
             
-            current_time += step_hours
+        # Window starts, accumulated step by step exactly as a running sum would
+        max_windows = int((end_time - start_time) / step_hours) + 2
+        starts = np.add.accumulate(
+            np.concatenate(([start_time], np.full(max_windows - 1, step_hours)))
+        )
+        starts = starts[starts <= end_time]
+        
+        # Time burden for every window from the prefix count of out-of-bounds samples
+        i_start, i_end = self._window_indices(
+            time_vector, starts, np.minimum(starts + window_hours, time_vector[-1])
+        )
+        counts = i_end + 1 - i_start
+        num_outside = self._cum_outside_count[i_end + 1] - self._cum_outside_count[i_start]
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            burden_values = np.where(counts > 0, num_outside / counts * 100, 0.0)
             
-        return np.array(time_centers), np.array(burden_values)
+        return starts + window_hours / 2, burden_values
         
     def get_burden_summary(
         self, 
@@ -214,11 +267,16 @@ class BurdenCalculator:
         
         # Add additional metrics
         if self.excess_above is not None and self.excess_below is not None:
+            # Excess is zero inside the bounds, so each mean is total / count
+            total_above = np.sum(self.excess_above)
+            total_below = np.sum(self.excess_below)
+            num_above = np.count_nonzero(self.outside_upper)
+            num_below = np.count_nonzero(self.outside_lower)
             metrics.update({
-                'total_excess_above': np.sum(self.excess_above),
-                'total_excess_below': np.sum(self.excess_below),
-                'mean_excess_above': np.mean(self.excess_above[self.outside_upper]),
-                'mean_excess_below': np.mean(self.excess_below[self.outside_lower])
+                'total_excess_above': total_above,
+                'total_excess_below': total_below,
+                'mean_excess_above': total_above / num_above if num_above else np.nan,
+                'mean_excess_below': total_below / num_below if num_below else np.nan
             })
             
         return metrics
\ No newline at end of file
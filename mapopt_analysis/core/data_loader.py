@@ -4,12 +4,38 @@ Data loading and preprocessing module for MAPopt Analysis Tool
 
 import os
 import re
+import glob
+import pickle
+import hashlib
+import functools
+import importlib.util
 import numpy as np
 import pandas as pd
 from scipy import signal
 from typing import Tuple, Optional
 
-from ..config import MAP_MIN, MAP_MAX, OUTLIER_THRESHOLD, MEDIAN_FILTER_SIZE, ROLLING_WINDOW_SIZE
+from .. import __version__
+from ..config import (
+    MAP_MIN, MAP_MAX, OUTLIER_THRESHOLD, MEDIAN_FILTER_SIZE, ROLLING_WINDOW_SIZE,
+    CACHE_DIR, CACHE_MAX_FILES
+)
+from ..utils.logger import get_logger
+
+# Prefer pandas' multi-threaded pyarrow CSV engine when pyarrow is installed
+# (checked without importing it); _read_csv falls back to the C engine when
+# pandas or pyarrow is too old for it
+_CSV_ENGINE = 'pyarrow' if importlib.util.find_spec("pyarrow") is not None else 'c'
+
+# File name prefix of preprocessed-data cache entries; only files matching it
+# are ever evicted, so CACHE_DIR may be shared with other files
+_CACHE_PREFIX = "mapopt_"
+
+
+@functools.lru_cache(maxsize=None)
+def _preprocessing_fingerprint() -> str:
+    """Hash of this module's source, part of the preprocessed-data cache key"""
+    with open(__file__, 'rb') as f:
+        return hashlib.blake2b(f.read(), digest_size=8).hexdigest()
 
 
 class DataLoader:
@@ -19,6 +45,7 @@ class DataLoader:
         self.data = None
         self.subject_id = None
         self.file_path = None
+        self._loaded_mtime = None
         
     def load_data(self, file_path: str) -> pd.DataFrame:
         """
@@ -37,15 +64,23 @@ class DataLoader:
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"File not found: {file_path}")
             
-        self.file_path = file_path
-        self.subject_id = self._extract_subject_id(file_path)
+        mtime = os.path.getmtime(file_path)
+        
+        # Reuse the preprocessed result if this exact file was loaded before
+        cache_path = self._cache_path(file_path)
+        if cache_path is not None and os.path.exists(cache_path):
+            try:
+                return self._set_loaded(pd.read_pickle(cache_path), file_path, mtime)
+            except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError) as e:
+                # Unreadable cache entry; reprocess and overwrite it
+                get_logger().warning(f"Ignoring unreadable cache entry {cache_path}: {e}")
         
         # Load data based on file extension
         try:
             if file_path.lower().endswith('.csv'):
-                data = pd.read_csv(file_path)
+                data = self._read_csv(file_path)
             else:
-                data = pd.read_csv(file_path, delimiter='\t')
+                data = self._read_csv(file_path, delimiter='\t')
         except Exception as e:
             raise ValueError(f"Error loading file: {e}")
             
@@ -61,9 +96,76 @@ class DataLoader:
         data = self._handle_duplicates(data)
         data = self._clean_data(data)
         
+        if cache_path is not None:
+            self._write_cache(data, cache_path)
+        
+        return self._set_loaded(data, file_path, mtime)
+        
+    def _set_loaded(self, data: pd.DataFrame, file_path: str, mtime: float) -> pd.DataFrame:
+        """Record a successful load; a failed load leaves the previous file's state intact"""
         self.data = data
+        self.file_path = file_path
+        self.subject_id = self._extract_subject_id(file_path)
+        self._loaded_mtime = mtime
         return data
         
+    def is_loaded(self, file_path: str) -> bool:
+        """Whether file_path is the loaded file and unchanged on disk since loading"""
+        if self.data is None or self._loaded_mtime is None:
+            return False
+        try:
+            return (os.path.abspath(file_path) == os.path.abspath(self.file_path) and
+                    os.path.getmtime(file_path) == self._loaded_mtime)
+        except OSError:
+            return False
+        
+    @staticmethod
+    def _read_csv(file_path: str, **kwargs) -> pd.DataFrame:
+        """Read a delimited file with the pyarrow engine if usable, else the C engine"""
+        if _CSV_ENGINE == 'pyarrow':
+            try:
+                return pd.read_csv(file_path, engine='pyarrow', **kwargs)
+            except (ValueError, ImportError):
+                pass  # Engine unsupported by this pandas/pyarrow, or input it rejects
+        return pd.read_csv(file_path, engine='c', **kwargs)
+        
+    @staticmethod
+    def _cache_path(file_path: str) -> Optional[str]:
+        """
+        Cache file for file_path, or None if caching is disabled
+        
+        The key covers the file (path, mtime, size), the preprocessing settings
+        and a fingerprint of this module's source, so editing the preprocessing
+        code invalidates old entries even without a version bump.
+        """
+        if CACHE_DIR is None:
+            return None
+        stat = os.stat(file_path)
+        settings = (MAP_MIN, MAP_MAX, OUTLIER_THRESHOLD, MEDIAN_FILTER_SIZE, ROLLING_WINDOW_SIZE)
+        key = (f"{os.path.abspath(file_path)}|{stat.st_mtime_ns}|{stat.st_size}|{settings}|"
+               f"{__version__}|{_preprocessing_fingerprint()}")
+        digest = hashlib.blake2b(key.encode(), digest_size=8).hexdigest()
+        return os.path.join(CACHE_DIR, f"{_CACHE_PREFIX}{digest}.pkl")
+        
+    @staticmethod
+    def _write_cache(data: pd.DataFrame, cache_path: str) -> None:
+        """Best-effort atomic write of preprocessed data, keeping at most CACHE_MAX_FILES entries"""
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            data.to_pickle(tmp_path)
+            os.replace(tmp_path, cache_path)
+            
+            # Evict the least recently written entries
+            pattern = os.path.join(os.path.dirname(cache_path), f"{_CACHE_PREFIX}*.pkl")
+            entries = sorted(glob.glob(pattern), key=os.path.getmtime)
+            for old_path in entries[:max(0, len(entries) - CACHE_MAX_FILES)]:
+                os.remove(old_path)
+        except OSError as e:
+            get_logger().warning(f"Could not write data cache {cache_path}: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        
     def _extract_subject_id(self, filename: str) -> str:
         """Extract subject ID from filename using regex"""
         matches = re.findall(r'(\d+)', os.path.basename(filename))
@@ -71,18 +173,12 @@ class DataLoader:
         
     def _handle_duplicates(self, data: pd.DataFrame) -> pd.DataFrame:
         """Handle duplicate time points by averaging values"""
-        # Check for duplicates
-        duplicates = data.duplicated(subset=['time'], keep=False)
-        
-        if duplicates.any():
-            # Average duplicate values
-            data = data.groupby('time').agg({
-                'MAP': 'mean', 
-                'rSO2': 'mean'
-            }).reset_index()
-            
-        # Ensure monotonic time
-        data = data.sort_values('time').reset_index(drop=True)
+        if data['time'].duplicated().any():
+            # Average duplicate values; grouping also returns rows sorted by time
+            data = data.groupby('time', sort=True, as_index=False)[['MAP', 'rSO2']].mean()
+        else:
+            # Ensure monotonic time, keeping the column dtypes as read
+            data = data.sort_values('time', ignore_index=True)
         
         # Fix any remaining non-monotonic issues
         self._fix_monotonic_time(data)
@@ -93,9 +189,13 @@ class DataLoader:
         """Ensure time vector is strictly monotonic"""
         time_diff = np.diff(data['time'])
         if np.any(time_diff <= 0):
-            for i in range(1, len(data)):
-                if data.loc[i, 'time'] <= data.loc[i-1, 'time']:
-                    data.loc[i, 'time'] = data.loc[i-1, 'time'] + 1e-6
+            # Running maximum of t - 1e-6*i with the ramp added back, so every
+            # step is at least 1e-6 hr. Unlike bumping only non-increasing
+            # samples, this also widens positive steps below 1e-6 hr and
+            # shifts the samples after them by the same amount
+            t = data['time'].to_numpy(dtype=np.float64)
+            ramp = 1e-6 * np.arange(len(t))
+            data['time'] = np.maximum.accumulate(t - ramp) + ramp
                     
     def _clean_data(self, data: pd.DataFrame) -> pd.DataFrame:
         """Clean and filter data"""
@@ -120,17 +220,27 @@ class DataLoader:
         time_step = np.mean(np.diff(data['time']))
         window_size = max(3, int(0.5 / time_step))
         
-        # Rolling statistics for outlier detection
-        rolling_mean = data['MAP'].rolling(window=window_size, center=True).mean()
-        rolling_std = data['MAP'].rolling(window=window_size, center=True).std()
+        # Rolling statistics for outlier detection (one window pass object)
+        rolling = data['MAP'].rolling(window=window_size, center=True)
+        rolling_mean = rolling.mean().to_numpy()
+        rolling_std = rolling.std().to_numpy()
         
         # Calculate Z-scores
-        z_scores = np.abs((data['MAP'] - rolling_mean) / rolling_std)
+        map_values = data['MAP'].to_numpy(dtype=np.float64)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            z_scores = np.abs((map_values - rolling_mean) / rolling_std)
         
-        # Replace outliers with NaN and interpolate
+        # Replace outliers by linear interpolation between neighbouring samples
         outliers = z_scores > OUTLIER_THRESHOLD
-        data.loc[outliers, 'MAP'] = np.nan
-        data['MAP'] = data['MAP'].interpolate(method='linear')
+        if np.any(outliers):
+            map_values = map_values.copy()
+            map_values[outliers] = np.nan
+            good = np.flatnonzero(~np.isnan(map_values))
+            if len(good) > 0:
+                bad = np.flatnonzero(np.isnan(map_values))
+                bad = bad[bad > good[0]]  # leading gaps stay NaN, as with pandas
+                map_values[bad] = np.interp(bad, good, map_values[good])
+            data['MAP'] = map_values
         
         return data
         
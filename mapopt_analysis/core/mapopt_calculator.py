@@ -5,20 +5,33 @@ MAPopt calculation module - core algorithm for optimal MAP determination
 import numpy as np
 import pandas as pd
 from scipy import signal
-from multiprocessing import Pool, cpu_count
+from scipy.interpolate import PchipInterpolator
 from typing import Tuple, List, Dict, Any
 
 from .signal_processing import SignalProcessor
 from ..config import (
     MAP_BINS, MAP_BIN_CENTERS, COX_WINDOWS_MIN, HISTORY_WINDOWS_HR,
     MAP_OPT_MIN, MAP_OPT_MAX, COX_WEIGHT_THRESHOLD, 
-    MAX_CORES, CHUNK_SIZE, TIME_STEP_MIN,
-    SAVGOL_WINDOW, SAVGOL_ORDER
+    CHUNK_SIZE, TIME_STEP_MIN,
+    SAVGOL_WINDOW, SAVGOL_ORDER, MIN_SEGMENT_POINTS
 )
 
+# Spacing of the shared window-start grid: every sliding window starts at
+# t_now - hist_hr + j * win_hr / 2, which for whole-minute time steps, COx
+# windows and history windows always lies on a half-minute grid
+GRID_STEP_HR = TIME_STEP_MIN / 2
+
+# Samples this close to a window edge count as lying on it, so windows are
+# half-open [start, end) regardless of floating-point rounding of the edges
+EDGE_TOLERANCE_HR = 1e-9
+
+# Largest distance (in grid steps) from the grid at which an offset still
+# counts as aligned; covers floating-point error of minute/hour conversions
+GRID_ALIGN_TOLERANCE = 1e-6
+
 
 class MAPoptCalculator:
-    """Calculates optimal MAP using parallel curve fitting analysis"""
+    """Calculates optimal MAP using vectorized curve fitting analysis"""
     
     def __init__(self):
         self.time_vector = None
@@ -32,7 +45,7 @@ class MAPoptCalculator:
         progress_callback=None
     ) -> Tuple[np.ndarray, np.ndarray, List[List[Dict]]]:
         """
-        Calculate MAPopt series using parallel processing
+        Calculate MAPopt series in batches of time points
         
         Args:
             data: DataFrame with columns [time, MAP, rSO2]
@@ -40,21 +53,37 @@ class MAPoptCalculator:
             
         Returns:
             Tuple of (time_vector, mapopt_series, all_fits_data)
+            
+        Raises:
+            ValueError: If the configured time step or windows are not multiples
+                of the half-minute analysis grid
         """
-        t = data['time'].values
-        MAP = data['MAP'].values
-        rSO2 = data['rSO2'].values
+        MAPoptCalculator._validate_grid_config()
+        
+        t = np.ascontiguousarray(data['time'].to_numpy(dtype=np.float64))
+        MAP = np.ascontiguousarray(data['MAP'].to_numpy(dtype=np.float64))
+        rSO2 = np.ascontiguousarray(data['rSO2'].to_numpy(dtype=np.float64))
         
         # Create time vector (1-minute intervals)
         self.time_vector = np.arange(t[0], t[-1], TIME_STEP_MIN)
+        num_points = len(self.time_vector)
         
-        # Prepare arguments for parallel processing
-        args_list = self._prepare_processing_args(t, MAP, rSO2)
+        # Correlate every COx window once, on a grid shared by all time points
+        grid_lo, cox_grid, map_grid = self._correlation_grid(t, MAP, rSO2, num_points)
         
-        # Process in parallel
-        mapopt_series, all_fits_data = self._process_parallel(
-            args_list, progress_callback
-        )
+        mapopt_series = np.full(num_points, np.nan)
+        all_fits_data = [[] for _ in range(num_points)]
+        
+        # Each batch fits every (COx window, history window) pair at once
+        for start in range(0, num_points, CHUNK_SIZE):
+            k = np.arange(start, min(start + CHUNK_SIZE, num_points))
+            mapopt_series[k] = self._process_time_points(
+                k, grid_lo, cox_grid, map_grid, all_fits_data
+            )
+            
+            # Update progress
+            if progress_callback:
+                progress_callback((k[-1] + 1) / num_points * 100)
         
         # Post-process results
         self.mapopt_series = mapopt_series
@@ -63,213 +92,297 @@ class MAPoptCalculator:
         
         return self.time_vector, self.mapopt_filled, self.all_fits_data
         
-    def _prepare_processing_args(
-        self, 
-        t: np.ndarray, 
-        MAP: np.ndarray, 
-        rSO2: np.ndarray
-    ) -> List[Tuple]:
-        """Prepare arguments for parallel processing"""
-        args_list = []
-        
-        for k, t_now in enumerate(self.time_vector):
-            args_list.append((
-                k, t_now, t, MAP, rSO2, 
-                MAP_BINS, MAP_BIN_CENTERS, 
-                COX_WINDOWS_MIN, HISTORY_WINDOWS_HR
-            ))
-            
-        return args_list
+    @staticmethod
+    def _correlation_grid(
+        t: np.ndarray,
+        MAP: np.ndarray,
+        rSO2: np.ndarray,
+        num_time_points: int
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Sliding-window correlations for every COx window on the start grid
         
-    def _process_parallel(
-        self, 
-        args_list: List[Tuple],
-        progress_callback=None
-    ) -> Tuple[np.ndarray, List[List[Dict]]]:
-        """Process MAPopt calculation in parallel"""
-        mapopt_series = np.full(len(self.time_vector), np.nan)
-        all_fits_data = [[] for _ in range(len(self.time_vector))]
+        Args:
+            t, MAP, rSO2: Signal arrays
+            num_time_points: Length of the 1-minute time vector
+            
+        Returns:
+            Tuple of (grid_lo, cox_grid, map_grid). grid_lo[m] is the index of
+            the first sample at or after grid time t[0] + m * GRID_STEP_HR;
+            cox_grid[i, m] and map_grid[i, m] hold the correlation and mean MAP
+            of the COX_WINDOWS_MIN[i] window starting at that grid time
+        """
+        cumsums = SignalProcessor.cumulative_sums(MAP, rSO2)
         
-        num_cores = min(cpu_count(), MAX_CORES)
+        # Grid covers every start up to the last time point (plus one step)
+        num_starts = MAPoptCalculator._grid_index(TIME_STEP_MIN) * num_time_points
+        grid_time = t[0] + np.arange(num_starts) * GRID_STEP_HR - EDGE_TOLERANCE_HR
+        grid_lo = np.searchsorted(t, grid_time)
         
-        try:
-            # Process in chunks for progress updates
-            total_chunks = len(args_list) // CHUNK_SIZE + 1
+        cox_grid = np.empty((len(COX_WINDOWS_MIN), num_starts))
+        map_grid = np.empty((len(COX_WINDOWS_MIN), num_starts))
+        for i, cox_win_min in enumerate(COX_WINDOWS_MIN):
+            win_hi = np.searchsorted(t, grid_time + cox_win_min / 60)
+            cox_grid[i], map_grid[i] = SignalProcessor.windowed_correlations(
+                cumsums, grid_lo, win_hi
+            )
             
-            with Pool(processes=num_cores) as pool:
-                for chunk_idx in range(total_chunks):
-                    start_idx = chunk_idx * CHUNK_SIZE
-                    end_idx = min((chunk_idx + 1) * CHUNK_SIZE, len(args_list))
-                    
-                    if start_idx >= len(args_list):
-                        break
-                        
-                    chunk_args = args_list[start_idx:end_idx]
-                    
-                    # Process chunk
-                    results = pool.map(self._process_time_point, chunk_args)
-                    
-                    # Store results
-                    for k, weighted_mapopt, local_fits in results:
-                        mapopt_series[k] = weighted_mapopt
-                        all_fits_data[k] = local_fits
-                    
-                    # Update progress
-                    if progress_callback:
-                        progress_pct = ((chunk_idx + 1) / total_chunks) * 100
-                        progress_callback(progress_pct)
-                        
-        except Exception as e:
-            # Fallback to single-threaded processing
-            for i, args in enumerate(args_list):
-                k, weighted_mapopt, local_fits = self._process_time_point(args)
-                mapopt_series[k] = weighted_mapopt
-                all_fits_data[k] = local_fits
-                
-                if progress_callback and i % 25 == 0:
-                    progress_pct = (i / len(args_list)) * 100
-                    progress_callback(progress_pct)
-                    
-        return mapopt_series, all_fits_data
+        return grid_lo, cox_grid, map_grid
         
     @staticmethod
-    def _process_time_point(args: Tuple) -> Tuple[int, float, List[Dict]]:
-        """Process single time point with full parameter space"""
-        (k, t_now, t, MAP, rSO2, bins, bin_centers, 
-         cox_windows_min, history_windows_hr) = args
+    def _process_time_points(
+        k: np.ndarray,
+        grid_lo: np.ndarray,
+        cox_grid: np.ndarray,
+        map_grid: np.ndarray,
+        all_fits_data: List[List[Dict]]
+    ) -> np.ndarray:
+        """
+        Weighted MAPopt for a batch of time points over the full parameter space
         
-        mapopts = []
-        weights = []
-        local_fits = []
+        Args:
+            k: Indices of the time points into the time vector
+            grid_lo, cox_grid, map_grid: Correlation grid from _correlation_grid
+            all_fits_data: Per-time-point fit lists, extended in place
+            
+        Returns:
+            Weighted MAPopt for each time point (NaN where no fit was accepted)
+        """
+        now = k * MAPoptCalculator._grid_index(TIME_STEP_MIN)
+        weighted_sum = np.zeros(len(k))
+        weight_sum = np.zeros(len(k))
         
-        for cox_win_min in cox_windows_min:
+        # Rows of the correlation grids follow the order of COX_WINDOWS_MIN
+        for i, cox_win_min in enumerate(COX_WINDOWS_MIN):
             win_hr = cox_win_min / 60
             
-            for hist_hr in history_windows_hr:
-                fit_result = MAPoptCalculator._calculate_single_fit(
-                    t_now, t, MAP, rSO2, win_hr, hist_hr, 
-                    bins, bin_centers
+            for hist_hr in HISTORY_WINDOWS_HR:
+                # History periods that start within the recording and hold enough samples
+                first = now - MAPoptCalculator._grid_index(hist_hr)
+                rows = np.flatnonzero(first >= 0)
+                rows = rows[grid_lo[now[rows]] - grid_lo[first[rows]] >= MIN_SEGMENT_POINTS]
+                
+                offsets = MAPoptCalculator._window_offsets(win_hr, hist_hr)
+                if len(rows) == 0 or len(offsets) < 5:
+                    continue
+                    
+                starts = first[rows, None] + offsets
+                fits = MAPoptCalculator._fit_curves(
+                    cox_grid[i, starts], map_grid[i, starts], win_hr, hist_hr,
+                    MAP_BINS, MAP_BIN_CENTERS
                 )
                 
-                if fit_result is not None:
-                    mapopt, weight, fit_data = fit_result
-                    mapopts.append(mapopt)
-                    weights.append(weight)
-                    local_fits.append(fit_data)
-        
-        if mapopts and len(weights) > 0:
-            weighted_mapopt = np.sum(np.array(mapopts) * np.array(weights)) / np.sum(weights)
-            return k, weighted_mapopt, local_fits
-        else:
-            return k, np.nan, []
+                for row, fit_data in fits:
+                    weighted_sum[rows[row]] += fit_data['mapopt'] * fit_data['weight']
+                    weight_sum[rows[row]] += fit_data['weight']
+                    all_fits_data[k[rows[row]]].append(fit_data)
+                    
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(weight_sum > 0, weighted_sum / weight_sum, np.nan)
             
     @staticmethod
-    def _calculate_single_fit(
-        t_now: float,
-        t: np.ndarray,
-        MAP: np.ndarray, 
-        rSO2: np.ndarray,
+    def _window_offsets(win_hr: float, hist_hr: float) -> np.ndarray:
+        """Grid offsets of the sliding windows from the start of a history period"""
+        step_size = win_hr / 2
+        num_steps = int((hist_hr - win_hr) / step_size) + 1
+        return np.arange(max(num_steps, 0)) * MAPoptCalculator._grid_index(step_size)
+        
+    @staticmethod
+    def _grid_index(offset_hr: float) -> int:
+        """
+        Number of grid steps in a grid-aligned time offset
+        
+        Raises:
+            ValueError: If offset_hr is not a multiple of GRID_STEP_HR
+        """
+        steps = offset_hr / GRID_STEP_HR
+        index = int(round(steps))
+        if abs(steps - index) > GRID_ALIGN_TOLERANCE:
+            raise ValueError(
+                f"Time offset {offset_hr * 60:g} min is not a multiple of the "
+                f"{GRID_STEP_HR * 60:g} min analysis grid"
+            )
+        return index
+        
+    @staticmethod
+    def _validate_grid_config() -> None:
+        """
+        Check that the configured time step, history windows and COx window
+        steps (half a window) all lie on the analysis grid
+        
+        Raises:
+            ValueError: If a configured value is not grid-aligned
+        """
+        MAPoptCalculator._grid_index(TIME_STEP_MIN)
+        for hist_hr in HISTORY_WINDOWS_HR:
+            MAPoptCalculator._grid_index(hist_hr)
+        for cox_win_min in COX_WINDOWS_MIN:
+            MAPoptCalculator._grid_index(cox_win_min / 60 / 2)
+        
+    @staticmethod
+    def _fit_curves(
+        cox_vals: np.ndarray,
+        map_vals: np.ndarray,
         win_hr: float,
         hist_hr: float,
         bins: np.ndarray,
         bin_centers: np.ndarray
-    ) -> Tuple[float, float, Dict]:
-        """Calculate single curve fit for given parameters"""
-        t_start = t_now - hist_hr
-        if t_start < t[0]:
-            return None
-            
-        # Get correlations and MAP values
-        cox_vals, map_vals = SignalProcessor.calculate_sliding_window_correlations(
-            t, MAP, rSO2, win_hr, hist_hr, t_now
-        )
+    ) -> List[Tuple[int, Dict]]:
+        """
+        Fit COx-vs-MAP curves for a batch of windowed correlation sets
         
-        if len(map_vals) < 5:
-            return None
+        Args:
+            cox_vals: Windowed correlations, one set per row (NaN = no value)
+            map_vals: Corresponding mean MAP values
+            win_hr: COx window size in hours
+            hist_hr: History period in hours
+            bins: MAP bin edges
+            bin_centers: MAP bin centers
             
-        # Bin correlations
-        binned_cox = SignalProcessor.bin_correlations(cox_vals, map_vals, bins)
+        Returns:
+            List of (row, fit_data) for the rows whose fit was accepted
+        """
+        num_rows = len(cox_vals)
+        num_bins = len(bins) - 1
+        keep = ~np.isnan(cox_vals)
+        
+        # Bin correlations: bin b holds bins[b] <= MAP < bins[b+1]
+        idx = np.searchsorted(bins, map_vals, side='right') - 1
+        in_bin = keep & (idx >= 0) & (idx < num_bins)
+        flat = (np.arange(num_rows)[:, None] * num_bins + idx)[in_bin]
+        sums = np.bincount(flat, weights=cox_vals[in_bin], minlength=num_rows * num_bins)
+        counts = np.bincount(flat, minlength=num_rows * num_bins)
         
-        # Apply Fisher transform
         with np.errstate(divide='ignore', invalid='ignore'):
+            binned_cox = np.where(counts > 0, sums / counts, np.nan).reshape(num_rows, num_bins)
+            
+            # Apply Fisher transform
             binned_cox_fisher = SignalProcessor.fisher_transform(binned_cox)
+            
+        # Rows need five correlations and three finite bins to be fitted
+        valid = np.isfinite(binned_cox_fisher)
+        num_valid = valid.sum(axis=1)
+        rows = np.flatnonzero((keep.sum(axis=1) >= 5) & (num_valid >= 3))
+        if len(rows) == 0:
+            return []
+            
+        valid = valid[rows]
+        num_valid = num_valid[rows]
+        y = np.where(valid, binned_cox_fisher[rows], 0.0)
         
-        valid = ~np.isnan(binned_cox_fisher) & np.isfinite(binned_cox_fisher)
+        # Polynomial fitting
+        coeffs = MAPoptCalculator._fit_quadratic(bin_centers, y, valid)
+        a, b, c = coeffs.T
         
-        if np.sum(valid) >= 3:
-            try:
-                # Polynomial fitting
-                coeffs = np.polyfit(bin_centers[valid], binned_cox_fisher[valid], 2)
-                
-                if coeffs[0] > 0:  # Upward parabola (minimum exists)
-                    # Calculate MAPopt
-                    mapopt_theoretical = -coeffs[1] / (2 * coeffs[0])
-                    
-                    # Constrain to data range
-                    data_min = np.min(bin_centers[valid])
-                    data_max = np.max(bin_centers[valid])
-                    mapopt = np.clip(mapopt_theoretical, data_min, data_max)
-                    
-                    if MAP_OPT_MIN <= mapopt <= MAP_OPT_MAX:
-                        # Calculate R-squared
-                        yfit = np.polyval(coeffs, bin_centers[valid])
-                        SSE = np.sum((binned_cox_fisher[valid] - yfit) ** 2)
-                        SST = np.sum((binned_cox_fisher[valid] - np.mean(binned_cox_fisher[valid])) ** 2)
-                        R2 = 1 - (SSE / SST)
-                        
-                        # Calculate nadir COx
-                        nadir_cox_fisher = np.polyval(coeffs, mapopt)
-                        nadir_cox = SignalProcessor.inverse_fisher_transform(nadir_cox_fisher)
-                        
-                        # Calculate weight
-                        weight = MAPoptCalculator._calculate_weight(nadir_cox, R2)
-                        
-                        if weight > 1e-6:
-                            fit_data = {
-                                'win_hr': win_hr,
-                                'hist_hr': hist_hr,
-                                'bin_centers': bin_centers[valid],
-                                'binned_cox': binned_cox[valid],
-                                'binned_cox_fisher': binned_cox_fisher[valid],
-                                'coeffs': coeffs,
-                                'mapopt': mapopt,
-                                'nadir_cox': nadir_cox,
-                                'r2': R2,
-                                'weight': weight
-                            }
-                            return mapopt, weight, fit_data
-            except:
-                pass
-                
-        return None
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # Calculate MAPopt, constrained to the range of the fitted bins
+            mapopt = np.clip(
+                -b / (2 * a),
+                np.where(valid, bin_centers, np.inf).min(axis=1),
+                np.where(valid, bin_centers, -np.inf).max(axis=1)
+            )
+            
+            # Calculate R-squared
+            yfit = (a[:, None] * bin_centers + b[:, None]) * bin_centers + c[:, None]
+            SSE = np.sum(np.where(valid, y - yfit, 0.0) ** 2, axis=1)
+            y_mean = y.sum(axis=1) / num_valid
+            SST = np.sum(np.where(valid, y - y_mean[:, None], 0.0) ** 2, axis=1)
+            R2 = 1 - (SSE / SST)
+            
+            # Calculate nadir COx and weight
+            nadir_cox = SignalProcessor.inverse_fisher_transform((a * mapopt + b) * mapopt + c)
+            weight = MAPoptCalculator._calculate_weight(nadir_cox, R2)
+            
+        # Upward parabola (minimum exists) with a plausible MAPopt and weight
+        accepted = (a > 0) & (MAP_OPT_MIN <= mapopt) & (mapopt <= MAP_OPT_MAX) & (weight > 1e-6)
+        
+        fits = []
+        for j in np.flatnonzero(accepted):
+            fits.append((rows[j], {
+                'win_hr': win_hr,
+                'hist_hr': hist_hr,
+                'bin_centers': bin_centers[valid[j]],
+                'binned_cox': binned_cox[rows[j], valid[j]],
+                'binned_cox_fisher': binned_cox_fisher[rows[j], valid[j]],
+                'coeffs': coeffs[j],
+                'mapopt': mapopt[j],
+                'nadir_cox': nadir_cox[j],
+                'r2': R2[j],
+                'weight': weight[j]
+            }))
+            
+        return fits
         
     @staticmethod
-    def _calculate_weight(nadir_cox: float, r2: float) -> float:
-        """Calculate weight for curve fit based on COx value and R-squared"""
-        if nadir_cox < 0:
-            # Negative COx - good autoregulation
-            cox_weight = -nadir_cox
-        elif nadir_cox <= COX_WEIGHT_THRESHOLD:
-            # Positive but low COx - scaled weight
-            cox_weight = (COX_WEIGHT_THRESHOLD - nadir_cox) / COX_WEIGHT_THRESHOLD
-        else:
-            # High positive correlation - poor autoregulation
-            cox_weight = 0
+    def _fit_quadratic(x: np.ndarray, y: np.ndarray, valid: np.ndarray) -> np.ndarray:
+        """
+        Closed-form least-squares quadratic fits over masked points
+        
+        Solves the 3x3 normal equations of every row at once on centred and
+        scaled x, rather than calling np.polyfit once per row.
+        
+        Args:
+            x: Shared x values
+            y: Data values, one row per fit
+            valid: Mask of the points used by each row (at least 3 per row)
             
+        Returns:
+            Coefficients [a, b, c] of a*x**2 + b*x + c per row (np.polyfit order)
+        """
+        w = valid.astype(np.float64)
+        center = (w @ x) / w.sum(axis=1)
+        scale = np.max(np.abs(x - center[:, None]) * w, axis=1)
+        u = (x - center[:, None]) / scale[:, None]
+        V = np.stack((u * u, u, np.ones_like(u)), axis=-1)
+        Vw = V * w[:, :, None]
+        a, b, c = np.linalg.solve(
+            np.einsum('rbi,rbj->rij', Vw, V), np.einsum('rbi,rb->ri', Vw, y)[:, :, None]
+        )[:, :, 0].T
+        
+        # Convert from the scaled variable back to x
+        a_x = a / scale ** 2
+        b_x = b / scale - 2 * a_x * center
+        c_x = c - b * center / scale + a_x * center ** 2
+        return np.column_stack((a_x, b_x, c_x))
+        
+    @staticmethod
+    def _calculate_weight(nadir_cox: np.ndarray, r2: np.ndarray) -> np.ndarray:
+        """Calculate weights for curve fits based on COx value and R-squared"""
+        cox_weight = np.where(
+            nadir_cox < 0,
+            # Negative COx - good autoregulation
+            -nadir_cox,
+            # Positive but low COx - scaled weight; high positive COx - no weight
+            np.where(
+                nadir_cox <= COX_WEIGHT_THRESHOLD,
+                (COX_WEIGHT_THRESHOLD - nadir_cox) / COX_WEIGHT_THRESHOLD,
+                0
+            )
+        )
         return r2 * cox_weight
         
     def _post_process_mapopt(self, mapopt_series: np.ndarray) -> np.ndarray:
         """Post-process MAPopt series with interpolation and smoothing"""
-        # Fill missing values with interpolation
-        mapopt_filled = pd.Series(mapopt_series).interpolate(method='pchip').values
+        mapopt_filled = np.array(mapopt_series, dtype=np.float64)
+        idx = np.arange(len(mapopt_filled))
+        good = ~np.isnan(mapopt_filled)
+        
+        # Fill missing values with PCHIP interpolation (trailing gaps are
+        # extrapolated; gaps before the first valid point are left for below)
+        if np.count_nonzero(good) >= 2:
+            gaps = ~good & (idx > np.argmax(good))
+            pchip = PchipInterpolator(idx[good], mapopt_filled[good])
+            mapopt_filled[gaps] = pchip(idx[gaps])
         
         # Clamp values to physiological range
-        mapopt_filled = np.clip(mapopt_filled, MAP_OPT_MIN, MAP_OPT_MAX)
+        np.clip(mapopt_filled, MAP_OPT_MIN, MAP_OPT_MAX, out=mapopt_filled)
         
-        # Fill any remaining NaN
-        mapopt_series_clean = pd.Series(mapopt_filled)
-        mapopt_series_clean = mapopt_series_clean.ffill().bfill()
-        mapopt_filled = mapopt_series_clean.values
+        # Fill any remaining NaN forward, then backward
+        missing = np.isnan(mapopt_filled)
+        if missing.any() and not missing.all():
+            source = np.maximum.accumulate(np.where(missing, -1, idx))
+            source[source < 0] = np.argmin(missing)
+            mapopt_filled = mapopt_filled[source]
         
         # Apply Savitzky-Golay filter for smoothing
         if len(mapopt_filled) > SAVGOL_WINDOW:
@@ -3,21 +3,38 @@ Signal processing module for correlation calculations and transforms
 """
 
 import numpy as np
-import pandas as pd
-from scipy.stats import pearsonr
-from typing import Tuple, List
+from typing import Tuple, List, TYPE_CHECKING
 
 from ..config import (
     COX_WINDOWS_MIN, MIN_DATA_POINTS, FISHER_BOUNDS,
     MIN_CORRELATION_POINTS
 )
 
+if TYPE_CHECKING:
+    import pandas as pd  # Annotation only; the array paths never need pandas
+
+# Column layout of the prefix-sum matrix built by cumulative_sums:
+# complete-row count, centred MAP (x) and rSO2 (y), their products, raw MAP sum
+# and finite-MAP count
+CUMSUM_COLUMNS = ('n', 'x', 'y', 'xx', 'yy', 'xy', 'map', 'map_n')
+
+# Relative tolerance below which a windowed variance taken from prefix sums
+# is treated as zero (constant signal), absorbing cumsum rounding error
+_SUM_RTOL = 1e-13
+
+# Fisher transform clip range, boxed once rather than on every call
+_FISHER_LO = np.float64(-FISHER_BOUNDS)
+_FISHER_HI = np.float64(FISHER_BOUNDS)
+
+# COx uses the shorter windows only (up to 30 minutes), in hours
+_COX_WINDOWS_HR = tuple(w / 60 for w in COX_WINDOWS_MIN if w <= 30)
+
 
 class SignalProcessor:
     """Handles signal processing operations for biomedical data"""
     
     @staticmethod
-    def calculate_cox_correlations(data: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+    def calculate_cox_correlations(data: 'pd.DataFrame') -> Tuple[np.ndarray, np.ndarray]:
         """
         Calculate COx correlation values using sliding windows
         
@@ -26,47 +43,71 @@ class SignalProcessor:
             
         Returns:
             Tuple of (cox_time, cox_values) arrays
+            
+        Raises:
+            ValueError: If time is not sorted in ascending order
         """
-        cox_windows_min = [w for w in COX_WINDOWS_MIN if w <= 30]  # Use shorter windows for COx
-        all_corr_time = []
-        all_corr_val = []
+        t = np.ascontiguousarray(data['time'].to_numpy(dtype=np.float64))
+        MAP = np.ascontiguousarray(data['MAP'].to_numpy(dtype=np.float64))
+        rSO2 = np.ascontiguousarray(data['rSO2'].to_numpy(dtype=np.float64))
         
-        t = data['time'].values
-        MAP = data['MAP'].values
-        rSO2 = data['rSO2'].values
+        return SignalProcessor.calculate_cox_correlations_arrays(t, MAP, rSO2)
+        
+    @staticmethod
+    def calculate_cox_correlations_arrays(
+        t: np.ndarray,
+        MAP: np.ndarray,
+        rSO2: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Calculate COx correlation values using sliding windows
         
-        for w in cox_windows_min:
-            win_hr = w / 60
-            if win_hr > 0.5:  # Skip windows longer than 30 minutes
-                continue
-                
+        Args:
+            t: Time vector in hours (ascending)
+            MAP: MAP values
+            rSO2: rSO2 values
+            
+        Returns:
+            Tuple of (cox_time, cox_values) arrays
+            
+        Raises:
+            ValueError: If time is not sorted in ascending order
+        """
+        t = np.asarray(t, dtype=np.float64)
+        SignalProcessor._check_sorted(t)
+        cumsums = SignalProcessor.cumulative_sums(MAP, rSO2)
+        
+        # Window count per size is known up front, so fill preallocated edge arrays
+        num_steps = [max(int((t[-1] - t[0] - win_hr) / (win_hr / 2)) + 1, 0) for win_hr in _COX_WINDOWS_HR]
+        win_start = np.empty(sum(num_steps))
+        win_end = np.empty(sum(num_steps))
+        
+        k = 0
+        for win_hr, n in zip(_COX_WINDOWS_HR, num_steps):
             step_size = win_hr / 2
-            num_steps = int((t[-1] - t[0] - win_hr) / step_size) + 1
-            
-            for s in range(num_steps):
-                win_start = t[0] + s * step_size
-                win_end = win_start + win_hr
-                
-                idx = (t >= win_start) & (t < win_end)
-                if np.sum(idx) < MIN_DATA_POINTS:
-                    continue
-                    
-                map_seg = MAP[idx]
-                rso2_seg = rSO2[idx]
-                
-                if len(map_seg) > 1:
-                    corr = SignalProcessor.fast_correlation(map_seg, rso2_seg)
-                    if not np.isnan(corr):
-                        all_corr_time.append((win_start + win_end) / 2)
-                        all_corr_val.append(corr)
-        
-        if all_corr_time:
-            # Average correlations at same time points
-            corr_df = pd.DataFrame({'time': all_corr_time, 'cox': all_corr_val})
-            corr_df = corr_df.groupby('time')['cox'].mean().reset_index()
-            return corr_df['time'].values, corr_df['cox'].values
-        else:
-            return np.array([]), np.array([])
+            np.add(t[0], np.arange(n) * step_size, out=win_start[k:k + n])
+            np.add(win_start[k:k + n], win_hr, out=win_end[k:k + n])
+            k += n
+            
+        # Windows of every size evaluated together: [win_start, win_end) by binary search
+        corr, _ = SignalProcessor.windowed_correlations(
+            cumsums, np.searchsorted(t, win_start), np.searchsorted(t, win_end)
+        )
+        valid = ~np.isnan(corr)
+        all_corr_time = ((win_start + win_end) / 2)[valid]
+        all_corr_val = corr[valid]
+        
+        # Average correlations at same time points (sorted unique times)
+        cox_time, inverse = np.unique(all_corr_time, return_inverse=True)
+        cox_values = np.bincount(inverse, weights=all_corr_val) / np.bincount(inverse)
+        
+        return cox_time, cox_values
+            
+    @staticmethod
+    def _check_sorted(time: np.ndarray) -> None:
+        """Window edges are found by binary search, which needs ascending time"""
+        if np.any(time[1:] < time[:-1]):
+            raise ValueError("Time vector must be sorted in ascending order")
             
     @staticmethod
     def fast_correlation(x: np.ndarray, y: np.ndarray) -> float:
@@ -82,21 +123,112 @@ class SignalProcessor:
         if len(x) < MIN_CORRELATION_POINTS or len(y) < MIN_CORRELATION_POINTS:
             return np.nan
             
-        try:
-            # Remove NaN values (like MATLAB's 'rows','complete')
-            mask = np.isfinite(x) & np.isfinite(y)
-            if np.sum(mask) < MIN_CORRELATION_POINTS:
-                return np.nan
-            
-            x_clean = x[mask]
-            y_clean = y[mask]
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        
+        # Remove NaN values (like MATLAB's 'rows','complete')
+        mask = np.isfinite(x) & np.isfinite(y)
+        if np.count_nonzero(mask) < MIN_CORRELATION_POINTS:
+            return np.nan
             
-            # Calculate correlation
-            return np.corrcoef(x_clean, y_clean)[0, 1]
-                
-        except:
+        # Correlation as the dot product of the mean-centred signals
+        xc = x[mask]
+        yc = y[mask]
+        xc = xc - xc.mean()
+        yc = yc - yc.mean()
+        denom = np.sqrt(xc.dot(xc) * yc.dot(yc))
+        if denom == 0.0:  # Constant signal
             return np.nan
             
+        return np.clip(xc.dot(yc) / denom, -1.0, 1.0)
+            
+    @staticmethod
+    def cumulative_sums(MAP: np.ndarray, rSO2: np.ndarray) -> np.ndarray:
+        """
+        Precompute prefix sums for O(1) windowed correlations
+        
+        Signals are mean-centred before summing to limit cancellation error.
+        Samples where either signal is non-finite contribute zero and are
+        excluded through the complete-row counts (like MATLAB's 'rows','complete').
+        
+        Args:
+            MAP: MAP values
+            rSO2: rSO2 values
+            
+        Returns:
+            C-contiguous float64 array of shape (len(MAP) + 1, 8) whose columns
+            are the prefix sums named in CUMSUM_COLUMNS; keeping a window's
+            sums on one row makes each edge lookup a single cache line
+        """
+        MAP = np.asarray(MAP, dtype=np.float64)
+        rSO2 = np.asarray(rSO2, dtype=np.float64)
+        map_finite = np.isfinite(MAP)
+        valid = map_finite & np.isfinite(rSO2)
+        
+        x = np.where(valid, MAP, 0.0)
+        y = np.where(valid, rSO2, 0.0)
+        if np.any(valid):
+            x = np.where(valid, x - np.mean(x[valid]), 0.0)
+            y = np.where(valid, y - np.mean(y[valid]), 0.0)
+            
+        # Products are written straight into their columns, no temporaries
+        terms = np.empty((len(MAP) + 1, len(CUMSUM_COLUMNS)))
+        terms[0] = 0.0
+        body = terms[1:]
+        body[:, 0] = valid
+        body[:, 1] = x
+        body[:, 2] = y
+        np.multiply(x, x, out=body[:, 3])
+        np.multiply(y, y, out=body[:, 4])
+        np.multiply(x, y, out=body[:, 5])
+        np.copyto(body[:, 6], MAP)
+        body[~map_finite, 6] = 0.0
+        body[:, 7] = map_finite
+        return np.cumsum(terms, axis=0, out=terms)
+        
+    @staticmethod
+    def windowed_correlations(
+        cumsums: np.ndarray,
+        lo: np.ndarray,
+        hi: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Pearson correlation and mean MAP over sample ranges [lo, hi)
+        
+        Args:
+            cumsums: Prefix sums from cumulative_sums
+            lo, hi: Start (inclusive) and end (exclusive) sample indices
+            
+        Returns:
+            Tuple of (correlations, map_means) arrays. Correlation is NaN for
+            windows with fewer than MIN_DATA_POINTS samples, too few complete
+            rows, or a constant signal; MAP mean is NaN if any MAP is missing.
+        """
+        lo = np.asarray(lo, dtype=np.intp)
+        hi = np.asarray(hi, dtype=np.intp)
+        
+        c_lo = np.take(cumsums, lo, axis=0)
+        c_hi = np.take(cumsums, hi, axis=0)
+        n, sx, sy, sxx, syy, sxy, map_sum, map_n = (c_hi - c_lo).T
+        
+        var_x = n * sxx - sx * sx
+        var_y = n * syy - sy * sy
+        tol_x = _SUM_RTOL * n * (c_hi[:, 3] + c_lo[:, 3])
+        tol_y = _SUM_RTOL * n * (c_hi[:, 4] + c_lo[:, 4])
+        
+        counts = hi - lo
+        ok = ((counts >= MIN_DATA_POINTS) & (n >= MIN_CORRELATION_POINTS) &
+              (var_x > tol_x) & (var_y > tol_y))
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            corr = (n * sxy - sx * sy) / np.sqrt(var_x * var_y)
+            map_mean = map_sum / counts
+            
+        corr = np.where(ok, np.clip(corr, -1.0, 1.0), np.nan)
+        map_mean = np.where(map_n == counts, map_mean, np.nan)
+        
+        return corr, map_mean
+        
     @staticmethod
     def fisher_transform(r: np.ndarray) -> np.ndarray:
         """
@@ -108,8 +240,8 @@ class SignalProcessor:
         Returns:
             Fisher-transformed values
         """
-        r_clipped = np.clip(r, -FISHER_BOUNDS, FISHER_BOUNDS)
-        return 0.5 * np.log((1 + r_clipped) / (1 - r_clipped))
+        # arctanh(r) == 0.5 * log((1 + r) / (1 - r)), in a single ufunc call
+        return np.arctanh(np.clip(r, _FISHER_LO, _FISHER_HI))
         
     @staticmethod
     def inverse_fisher_transform(z: np.ndarray) -> np.ndarray:
@@ -146,43 +278,33 @@ class SignalProcessor:
             
         Returns:
             Tuple of (cox_values, map_values) lists
+            
+        Raises:
+            ValueError: If time is not sorted in ascending order
         """
+        SignalProcessor._check_sorted(time)
         t_start = t_now - hist_hr
         
-        # Get data segment
-        idx = (time >= t_start) & (time < t_now)
-        if np.sum(idx) < 60:  # Need minimum data points
+        # Get data segment [t_start, t_now)
+        seg_lo, seg_hi = np.searchsorted(time, [t_start, t_now])
+        if seg_hi - seg_lo < 60:  # Need minimum data points
             return [], []
             
-        time_seg = time[idx]
-        map_seg = MAP[idx]
-        rso2_seg = rSO2[idx]
-        
-        cox_vals = []
-        map_vals = []
+        cumsums = SignalProcessor.cumulative_sums(MAP[seg_lo:seg_hi], rSO2[seg_lo:seg_hi])
         
-        # Sliding window analysis
+        # Sliding window analysis, all windows at once
         step_size = win_hr / 2
         num_steps = int((hist_hr - win_hr) / step_size) + 1
         
-        for s in range(num_steps):
-            win_start = t_now - hist_hr + s * step_size
-            win_end = win_start + win_hr
-            
-            win_idx = (time_seg >= win_start) & (time_seg < win_end)
-            if np.sum(win_idx) < MIN_DATA_POINTS:
-                continue
-                
-            map_win = map_seg[win_idx]
-            rso2_win = rso2_seg[win_idx]
-            
-            if len(map_win) > 1:
-                corr = SignalProcessor.fast_correlation(map_win, rso2_win)
-                if not np.isnan(corr):
-                    cox_vals.append(corr)
-                    map_vals.append(np.mean(map_win))
-                    
-        return cox_vals, map_vals
+        win_start = t_now - hist_hr + np.arange(max(num_steps, 0)) * step_size
+        win_end = win_start + win_hr
+        win_lo = np.clip(np.searchsorted(time, win_start), seg_lo, seg_hi) - seg_lo
+        win_hi = np.clip(np.searchsorted(time, win_end), seg_lo, seg_hi) - seg_lo
+        
+        corr, map_mean = SignalProcessor.windowed_correlations(cumsums, win_lo, win_hi)
+        valid = ~np.isnan(corr)
+        
+        return list(corr[valid]), list(map_mean[valid])
         
     @staticmethod
     def bin_correlations(
@@ -204,15 +326,17 @@ class SignalProcessor:
         if len(cox_vals) < 5:
             return np.full(len(bins) - 1, np.nan)
             
-        cox_vals = np.array(cox_vals)
-        map_vals = np.array(map_vals)
-        bin_centers = bins[:-1] + np.diff(bins) / 2
+        cox_vals = np.asarray(cox_vals, dtype=np.float64)
+        map_vals = np.asarray(map_vals, dtype=np.float64)
+        num_bins = len(bins) - 1
+        
+        # Bin b holds bins[b] <= MAP < bins[b+1]; out-of-range and NaN MAP are dropped
+        idx = np.searchsorted(bins, map_vals, side='right') - 1
+        in_range = (idx >= 0) & (idx < num_bins)
+        idx = idx[in_range]
         
-        binned_cox = np.full(len(bin_centers), np.nan)
+        sums = np.bincount(idx, weights=cox_vals[in_range], minlength=num_bins)
+        counts = np.bincount(idx, minlength=num_bins)
         
-        for b in range(len(bin_centers)):
-            bin_mask = (map_vals >= bins[b]) & (map_vals < bins[b+1])
-            if np.any(bin_mask):
-                binned_cox[b] = np.mean(cox_vals[bin_mask])
-                
-        return binned_cox 
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(counts > 0, sums / counts, np.nan) 
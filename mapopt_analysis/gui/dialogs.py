@@ -275,18 +275,12 @@ class SettingsDialog:
         analysis_frame = ttk.LabelFrame(main_frame, text="Analysis Settings", padding=10)
         analysis_frame.pack(fill=tk.X, pady=(0, 10))
         
-        # Parallel processing
-        ttk.Label(analysis_frame, text="Max CPU Cores:").grid(row=0, column=0, sticky='w', pady=2)
-        self.cores_var = tk.IntVar(value=8)
-        cores_spin = ttk.Spinbox(analysis_frame, from_=1, to=16, textvariable=self.cores_var, width=10)
-        cores_spin.grid(row=0, column=1, sticky='w', padx=(10, 0), pady=2)
-        
         # Outlier threshold
-        ttk.Label(analysis_frame, text="Outlier Threshold (σ):").grid(row=1, column=0, sticky='w', pady=2)
+        ttk.Label(analysis_frame, text="Outlier Threshold (σ):").grid(row=0, column=0, sticky='w', pady=2)
         self.outlier_var = tk.DoubleVar(value=3.0)
         outlier_spin = ttk.Spinbox(analysis_frame, from_=1.0, to=5.0, increment=0.1, 
                                   textvariable=self.outlier_var, width=10)
-        outlier_spin.grid(row=1, column=1, sticky='w', padx=(10, 0), pady=2)
+        outlier_spin.grid(row=0, column=1, sticky='w', padx=(10, 0), pady=2)
         
         # Plot Settings
         plot_frame = ttk.LabelFrame(main_frame, text="Plot Settings", padding=10)
@@ -326,7 +320,6 @@ class SettingsDialog:
         
     def reset_defaults(self):
         """Reset settings to defaults"""
-        self.cores_var.set(8)
         self.outlier_var.set(3.0)
         self.dpi_var.set(300)
         self.autosave_var.set(False)
\ No newline at end of file
@@ -5,9 +5,11 @@ Main GUI window for MAPopt Analysis Tool
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, scrolledtext
 import threading
+import time
 import os
-from datetime import datetime
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
+import collections
+import gc
+import numpy as np
 
 from ..core.data_loader import DataLoader
 from ..core.signal_processing import SignalProcessor
@@ -16,7 +18,7 @@ from ..core.burden_metrics import BurdenCalculator
 from ..visualization.plots import PlotManager
 from ..utils.file_io import FileManager
 from ..utils.logger import AnalysisLogger
-from ..config import WINDOW_TITLE, WINDOW_SIZE
+from ..config import WINDOW_TITLE, WINDOW_SIZE, LOG_FLUSH_MS, LOG_MAX_LINES, BURDEN_DEBOUNCE_MS
 from .dialogs import CurveFitsDialog
 
 
@@ -27,7 +29,13 @@ class MAPoptAnalysisGUI:
         self.root = root
         self.root.title(WINDOW_TITLE)
         self.root.geometry(WINDOW_SIZE)
-        self.root.state('zoomed')  # Maximize window on Windows
+        
+        # Maximize where the window manager supports it (not on X11); else keep WINDOW_SIZE
+        try:
+            self.root.state('zoomed')
+            self.is_maximized = True
+        except tk.TclError:
+            self.is_maximized = False
         
         # Initialize components
         self.data_loader = DataLoader()
@@ -41,12 +49,19 @@ class MAPoptAnalysisGUI:
         self.cox_time = None
         self.cox_values = None
         self.last_burden_results = None
+        self.canvas = None
+        self.toolbar = None
+        self._burden_job = None  # Pending debounced burden update
+        self._fits_cache = {}  # Rounded requested time -> (actual_time, fits)
         
         # GUI setup
         self.setup_gui()
         
-        # Set logger callback
+        # Set logger callback; lines are queued (from any thread) and written in batches
+        self._log_queue = collections.deque()
+        self._ts_cache = (0, "")  # (epoch second, "HH:MM:SS") of the last log line
         self.logger.set_gui_callback(self.log_message)
+        self.root.after(LOG_FLUSH_MS, self._flush_log)
         
         # Initial messages
         self.logger.info("MAPopt Analysis Tool initialized", "🔬")
@@ -115,6 +130,10 @@ class MAPoptAnalysisGUI:
         
         ttk.Button(time_frame, text="Calculate Burden", 
                   command=self.calculate_burden).grid(row=2, column=0, columnspan=2, pady=5)
+        
+        # Recalculate automatically once typing in either entry pauses
+        self.start_var.trace_add('write', self._schedule_burden_update)
+        self.end_var.trace_add('write', self._schedule_burden_update)
                   
     def setup_curve_controls(self, parent):
         """Setup curve fits controls"""
@@ -135,6 +154,15 @@ class MAPoptAnalysisGUI:
         save_frame.pack(side=tk.LEFT)
         
         ttk.Button(save_frame, text="Save Results", command=self.save_results).pack(pady=2)
+        
+        # Time series export format (Parquet listed only when pyarrow is installed)
+        formats = [ext.lstrip('.') for ext in self.file_manager.get_supported_formats()['export_data']]
+        self.export_format_var = tk.StringVar(value='csv')
+        ttk.Combobox(save_frame, textvariable=self.export_format_var, values=formats,
+                     state='readonly', width=10).pack(pady=2)
+        self.release_fits_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(save_frame, text="Free curve fits after saving",
+                        variable=self.release_fits_var).pack(pady=2)
         ttk.Button(save_frame, text="Save Figure", command=self.save_figure).pack(pady=2)
         
     def setup_content_area(self, parent):
@@ -150,8 +178,8 @@ class MAPoptAnalysisGUI:
         self.results_frame = ttk.Frame(self.notebook)
         self.notebook.add(self.results_frame, text="Results & Log")
         
-        # Setup results text area
-        self.results_text = scrolledtext.ScrolledText(self.results_frame, height=20)
+        # Setup results text area (read-only; enabled only while log lines are written)
+        self.results_text = scrolledtext.ScrolledText(self.results_frame, height=20, state=tk.DISABLED)
         self.results_text.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
         
     def setup_status_bar(self, parent):
@@ -166,11 +194,26 @@ class MAPoptAnalysisGUI:
         self.progress.pack(fill=tk.X, pady=(5, 0))
         
     def log_message(self, message: str):
-        """Add message to results log"""
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        self.results_text.insert(tk.END, f"[{timestamp}] {message}\n")
-        self.results_text.see(tk.END)
-        self.root.update()
+        """Queue message for the results log"""
+        # Format the timestamp once per second rather than once per line
+        sec = int(time.time())
+        if sec != self._ts_cache[0]:
+            self._ts_cache = (sec, time.strftime("%H:%M:%S", time.localtime(sec)))
+        self._log_queue.append(f"[{self._ts_cache[1]}] {message}\n")
+        
+    def _flush_log(self):
+        """Write queued log lines in a single insert, then reschedule"""
+        if self._log_queue:
+            batch = []
+            while self._log_queue:
+                batch.append(self._log_queue.popleft())
+            self.results_text.configure(state=tk.NORMAL)
+            self.results_text.insert(tk.END, "".join(batch))
+            # Cap the buffer so insert and layout cost stay bounded in long sessions
+            self.results_text.delete('1.0', f'end-{LOG_MAX_LINES}l')
+            self.results_text.configure(state=tk.DISABLED)
+            self.results_text.yview_moveto(1.0)
+        self.root.after(LOG_FLUSH_MS, self._flush_log)
         
     def browse_file(self):
         """Browse for data file"""
@@ -203,19 +246,27 @@ class MAPoptAnalysisGUI:
         """Run the complete analysis pipeline"""
         try:
             self.logger.info("Starting MAPopt analysis...", "🚀")
+            self._fits_cache = {}
             
             # Load data
             data = self.data_loader.load_data(self.file_var.get())
             
             # Calculate COx correlations
             self.logger.info("Calculating COx correlations...", "📈")
+            self.set_status("Calculating COx correlations...")
             self.cox_time, self.cox_values = SignalProcessor.calculate_cox_correlations(data)
             
             # Calculate MAPopt series
             self.logger.info("Calculating MAPopt series (this may take a few minutes)...", "🎯")
             
+            # Forward at most ~10 updates/s (or each whole percent) to the Tk event queue
+            last_pct, last_t = [-1.0], [0.0]
+            
             def progress_callback(pct):
-                self.root.after(0, lambda: self.status_var.set(f"MAPopt calculation: {pct:.1f}%"))
+                now = time.monotonic()
+                if pct - last_pct[0] >= 1.0 or now - last_t[0] >= 0.1 or pct >= 100:
+                    last_pct[0], last_t[0] = pct, now
+                    self.set_status(f"MAPopt calculation: {pct:.1f}%")
                 
             time_vector, mapopt_filled, all_fits_data = self.mapopt_calculator.calculate_mapopt_series(
                 data, progress_callback
@@ -225,54 +276,82 @@ class MAPoptAnalysisGUI:
             self.logger.info("Calculating deviation and burden metrics...", "📊")
             self.burden_calculator.calculate_deviation_and_burden(data, time_vector, mapopt_filled)
             
+            # Set initial time ranges (before plotting, whose initial burden uses them)
+            self.root.after(0, lambda: self.start_var.set(time_vector[0]))
+            self.root.after(0, lambda: self.end_var.set(time_vector[-1]))
+            
             # Create plots
             self.logger.info("Creating visualization plots...", "🖼️")
             self.root.after(0, lambda: self.create_plots(data, time_vector, mapopt_filled))
             
-            # Set initial time ranges
-            self.root.after(0, lambda: self.start_var.set(time_vector[0]))
-            self.root.after(0, lambda: self.end_var.set(time_vector[-1]))
-            
-            self.progress.stop()
-            self.status_var.set("Analysis completed successfully")
+            self.root.after(0, self.progress.stop)
+            self.set_status("Analysis completed successfully")
             self.logger.success("Analysis completed successfully!")
             self.logger.info(f"Time range: {time_vector[0]:.2f} - {time_vector[-1]:.2f} hours", "📊")
             
         except Exception as e:
-            self.progress.stop()
-            self.status_var.set("Analysis failed")
+            self.root.after(0, self.progress.stop)
+            self.set_status("Analysis failed")
             self.logger.error(f"Error during analysis: {str(e)}")
             self.root.after(0, lambda: messagebox.showerror("Analysis Error", f"Error during analysis:\n{str(e)}"))
             
+    def set_status(self, text: str):
+        """Update the status bar from any thread (Tk calls run on the main loop)"""
+        self.root.after(0, self.status_var.set, text)
+        
     def create_plots(self, data, time_vector, mapopt_filled):
         """Create the main analysis plots"""
-        # Clear existing plots
-        for widget in self.plot_frame.winfo_children():
-            widget.destroy()
-            
-        # Create plots using plot manager
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
+        
+        # Create plots using plot manager, redrawing into the embedded figure if any
         fig = self.plot_manager.create_main_analysis_plots(
             data, self.cox_time, self.cox_values, time_vector, mapopt_filled,
             self.burden_calculator.deviation,
             self.burden_calculator.outside_upper,
             self.burden_calculator.outside_lower,
-            self.data_loader.subject_id
+            self.data_loader.subject_id,
+            fig=self.canvas.figure if self.canvas is not None else None
         )
         
-        # Embed plot in GUI
-        self.canvas = FigureCanvasTkAgg(fig, self.plot_frame)
-        self.canvas.draw()
-        self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        # Embed plot in GUI; canvas and toolbar are built once and reused across analyses
+        if self.canvas is None:
+            self.canvas = FigureCanvasTkAgg(fig, self.plot_frame)
+            self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+            self.toolbar = NavigationToolbar2Tk(self.canvas, self.plot_frame)
+        self.plot_manager.attach_canvas(self.canvas)
+        self.canvas.draw_idle()  # Rendered once, after the initial burden update below
         
-        # Add navigation toolbar
-        toolbar = NavigationToolbar2Tk(self.canvas, self.plot_frame)
-        toolbar.update()
+        # Reset the toolbar's zoom/pan history for the new plots
+        self.toolbar.update()
         
         # Initial burden calculation
         self.calculate_burden()
         
+    def _schedule_burden_update(self, *_):
+        """Recalculate burden once the time range has been idle for BURDEN_DEBOUNCE_MS"""
+        if self._burden_job is not None:
+            self.root.after_cancel(self._burden_job)
+        self._burden_job = self.root.after(BURDEN_DEBOUNCE_MS, self._live_burden_update)
+        
+    def _live_burden_update(self):
+        """Debounced burden update; incomplete or invalid ranges are skipped silently"""
+        self._burden_job = None
+        if self.mapopt_calculator.time_vector is None or self.canvas is None:
+            return
+        try:
+            if self.start_var.get() >= self.end_var.get():
+                return
+        except tk.TclError:  # Entry holds a partial number while typing
+            return
+        self.calculate_burden()
+        
     def calculate_burden(self):
         """Calculate and display burden metrics"""
+        # An explicit update supersedes any pending debounced one
+        if self._burden_job is not None:
+            self.root.after_cancel(self._burden_job)
+            self._burden_job = None
+            
         if self.mapopt_calculator.time_vector is None:
             messagebox.showerror("Error", "No analysis data available")
             return
@@ -312,8 +391,8 @@ class MAPoptAnalysisGUI:
             # Store results
             self.last_burden_results = results
             
-            # Refresh canvas
-            self.canvas.draw()
+            # Repaint just the time indicators and title over the cached plots
+            self.plot_manager.blit()
             
         except Exception as e:
             messagebox.showerror("Error", f"Error calculating burden: {str(e)}")
@@ -321,17 +400,26 @@ class MAPoptAnalysisGUI:
     def show_curve_fits(self):
         """Show curve fits for a specific time point"""
         if self.mapopt_calculator.all_fits_data is None:
-            messagebox.showerror("Error", "No analysis data available")
+            if self.mapopt_calculator.time_vector is not None:
+                messagebox.showerror("Error", "Curve fits were freed after saving. Re-run the analysis to view them.")
+            else:
+                messagebox.showerror("Error", "No analysis data available")
             return
             
         try:
             t_show = self.time_var.get()
-            
-            # Find nearest time point
-            time_vector = self.mapopt_calculator.time_vector
-            idx = np.argmin(np.abs(time_vector - t_show))
-            actual_time = time_vector[idx]
-            fits = self.mapopt_calculator.all_fits_data[idx]
+            key = round(t_show, 4)
+            
+            if key not in self._fits_cache:
+                # Find nearest time point (time vector is ascending; ties go to the earlier one)
+                time_vector = self.mapopt_calculator.time_vector
+                pos = int(np.searchsorted(time_vector, t_show))
+                idx = min(pos, len(time_vector) - 1)
+                if pos > 0 and (pos == len(time_vector) or
+                                t_show - time_vector[pos - 1] <= time_vector[pos] - t_show):
+                    idx = pos - 1
+                self._fits_cache[key] = (time_vector[idx], self.mapopt_calculator.all_fits_data[idx])
+            actual_time, fits = self._fits_cache[key]
             
             if not fits:
                 messagebox.showwarning("Warning", f"No valid curve fits found at time {actual_time:.2f} hours.")
@@ -346,17 +434,22 @@ class MAPoptAnalysisGUI:
             
     def show_data_summary(self):
         """Show data quality summary"""
-        if self.data_loader.data is None:
-            if not self.file_var.get():
+        # Summarize the analyzed data if it is the selected file; any other file is
+        # loaded separately so the current analysis keeps its own data and subject
+        file_path = self.file_var.get()
+        loader = self.data_loader
+        if loader.data is None or (file_path and not loader.is_loaded(file_path)):
+            if not file_path:
                 messagebox.showerror("Error", "Please select a data file first")
                 return
+            loader = DataLoader()
             try:
-                self.data_loader.load_data(self.file_var.get())
+                loader.load_data(file_path)
             except Exception as e:
                 messagebox.showerror("Error", f"Error loading data: {str(e)}")
                 return
                 
-        summary = self.data_loader.get_data_summary()
+        summary = loader.get_data_summary()
         
         self.logger.info("", "")
         self.logger.info("DATA SUMMARY", "📊")
@@ -389,13 +482,15 @@ class MAPoptAnalysisGUI:
                 return
                 
             saved_files = []
+            analysis_datetime = self.file_manager.analysis_datetime()  # Shared by all files of this save
             
             # Save burden metrics
             burden_file = self.file_manager.save_burden_metrics(
                 self.last_burden_results,
                 self.data_loader.subject_id,
                 self.data_loader.file_path,
-                save_dir
+                save_dir,
+                analysis_datetime
             )
             saved_files.append(burden_file)
             
@@ -408,28 +503,39 @@ class MAPoptAnalysisGUI:
                 self.burden_calculator.deviation,
                 self.burden_calculator.outside_bounds,
                 self.data_loader.subject_id,
-                save_dir
+                save_dir,
+                fmt=self.export_format_var.get()
             )
             saved_files.append(timeseries_file)
             
             # Create manifest
             manifest_file = self.file_manager.create_results_manifest(
-                save_dir, self.data_loader.subject_id, saved_files
+                save_dir, self.data_loader.subject_id, saved_files, analysis_datetime
             )
             
+            burden_name = os.path.basename(burden_file)
+            timeseries_name = os.path.basename(timeseries_file)
+            
             self.logger.success(f"Results saved:", "💾")
-            self.logger.info(f"   Burden metrics: {os.path.basename(burden_file)}", "📊")
-            self.logger.info(f"   Time series: {os.path.basename(timeseries_file)}", "📈")
+            self.logger.info(f"   Burden metrics: {burden_name}", "📊")
+            self.logger.info(f"   Time series: {timeseries_name}", "📈")
             
             messagebox.showinfo("Success", 
-                f"Results saved successfully to:\n{save_dir}\n\nFiles:\n• {os.path.basename(burden_file)}\n• {os.path.basename(timeseries_file)}")
+                f"Results saved successfully to:\n{save_dir}\n\nFiles:\n• {burden_name}\n• {timeseries_name}")
+            
+            # Optionally drop the per-time-point fit dicts (the largest analysis result)
+            if self.release_fits_var.get() and self.mapopt_calculator.all_fits_data is not None:
+                self.mapopt_calculator.all_fits_data = None
+                self._fits_cache = {}
+                gc.collect()
+                self.logger.info("Curve fit data released to free memory", "🧹")
             
         except Exception as e:
             messagebox.showerror("Error", f"Error saving results: {str(e)}")
             
     def save_figure(self):
         """Save current figure"""
-        if not hasattr(self, 'canvas') or self.plot_manager.fig is None:
+        if self.canvas is None or self.plot_manager.fig is None:
             messagebox.showerror("Error", "No figure to save")
             return
             
@@ -459,10 +565,11 @@ def run_gui():
     root = tk.Tk()
     app = MAPoptAnalysisGUI(root)
     
-    # Center window on screen
-    root.update_idletasks()
-    x = (root.winfo_screenwidth() // 2) - (root.winfo_width() // 2)
-    y = (root.winfo_screenheight() // 2) - (root.winfo_height() // 2)
-    root.geometry(f"+{x}+{y}")
+    # Center window on screen (a maximized window needs no extra layout pass)
+    if not app.is_maximized:
+        root.update_idletasks()
+        x = (root.winfo_screenwidth() // 2) - (root.winfo_width() // 2)
+        y = (root.winfo_screenheight() // 2) - (root.winfo_height() // 2)
+        root.geometry(f"+{x}+{y}")
     
     root.mainloop() 
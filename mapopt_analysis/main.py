@@ -4,24 +4,15 @@ Main entry point for MAPopt Analysis Tool
 
 import sys
 import argparse
-import tkinter as tk
 from pathlib import Path
 
-# Add the package directory to Python path
-package_dir = Path(__file__).parent.parent
-sys.path.insert(0, str(package_dir))
-
-from mapopt_analysis.gui.main_window import run_gui
-from mapopt_analysis.core.data_loader import DataLoader
-from mapopt_analysis.core.signal_processing import SignalProcessor
-from mapopt_analysis.core.mapopt_calculator import MAPoptCalculator
-from mapopt_analysis.core.burden_metrics import BurdenCalculator
-from mapopt_analysis.utils.file_io import FileManager
+# Analysis and GUI modules are imported in the branch that uses them
 from mapopt_analysis.utils.logger import get_logger, set_log_level
 import mapopt_analysis
 
 
-def run_cli_analysis(data_file: str, output_dir: str = None, time_start: float = None, time_end: float = None):
+def run_cli_analysis(data_file: str, output_dir: str = None, time_start: float = None, time_end: float = None,
+                     export_format: str = 'csv'):
     """
     Run analysis in command-line mode
     
@@ -30,7 +21,14 @@ def run_cli_analysis(data_file: str, output_dir: str = None, time_start: float =
         output_dir: Directory to save results (optional)
         time_start: Start time for burden analysis (optional)
         time_end: End time for burden analysis (optional)
+        export_format: Time series file format: 'csv', 'npz' or 'parquet'
     """
+    from mapopt_analysis.core.data_loader import DataLoader
+    from mapopt_analysis.core.signal_processing import SignalProcessor
+    from mapopt_analysis.core.mapopt_calculator import MAPoptCalculator
+    from mapopt_analysis.core.burden_metrics import BurdenCalculator
+    from mapopt_analysis.utils.file_io import FileManager
+    
     logger = get_logger()
     
     try:
@@ -67,15 +65,17 @@ def run_cli_analysis(data_file: str, output_dir: str = None, time_start: float =
         # Calculate burden metrics
         burden_results = burden_calculator.calculate_burden_metrics(time_vector, time_start, time_end)
         
-        # Display results
-        logger.info("="*50)
-        logger.info("ANALYSIS RESULTS", "📊")
-        logger.info("="*50)
-        logger.info(f"Subject ID: {data_loader.subject_id}", "👤")
-        logger.info(f"Time Range: {time_start:.2f} - {time_end:.2f} hours", "⏰")
-        logger.info(f"Time Burden: {burden_results['time_burden']:.1f}%", "📈")
-        logger.info(f"Area Burden: {burden_results['area_burden_ratio']:.1f}%", "📉")
-        logger.info("="*50)
+        # Display results as a single log record
+        logger.info("\n".join([
+            "="*50,
+            "ANALYSIS RESULTS",
+            "="*50,
+            f"Subject ID: {data_loader.subject_id}",
+            f"Time Range: {time_start:.2f} - {time_end:.2f} hours",
+            f"Time Burden: {burden_results['time_burden']:.1f}%",
+            f"Area Burden: {burden_results['area_burden_ratio']:.1f}%",
+            "="*50
+        ]), "📊")
         
         # Save results if output directory specified
         if output_dir:
@@ -92,12 +92,14 @@ def run_cli_analysis(data_file: str, output_dir: str = None, time_start: float =
             timeseries_file = file_manager.save_timeseries_data(
                 time_vector, cox_time, cox_values, data, mapopt_filled,
                 burden_calculator.deviation, burden_calculator.outside_bounds,
-                data_loader.subject_id, output_dir
+                data_loader.subject_id, output_dir, fmt=export_format
             )
             
-            logger.success(f"Results saved successfully!", "✅")
-            logger.info(f"   Burden metrics: {Path(burden_file).name}", "📊")
-            logger.info(f"   Time series: {Path(timeseries_file).name}", "📈")
+            logger.success("\n".join([
+                "Results saved successfully!",
+                f"   Burden metrics: {Path(burden_file).name}",
+                f"   Time series: {Path(timeseries_file).name}"
+            ]), "✅")
             
     except Exception as e:
         logger.error(f"Error during analysis: {str(e)}")
@@ -155,6 +157,13 @@ Examples:
         help='End time for burden analysis (hours)'
     )
     
+    parser.add_argument(
+        '--format',
+        choices=['csv', 'npz', 'parquet'],
+        default='csv',
+        help='Time series output format (parquet needs pyarrow; default: csv)'
+    )
+    
     parser.add_argument(
         '--gui',
         action='store_true',
@@ -181,11 +190,13 @@ Examples:
             data_file=args.file,
             output_dir=args.output,
             time_start=args.start,
-            time_end=args.end
+            time_end=args.end,
+            export_format=args.format
         )
     else:
         # GUI mode
         try:
+            from mapopt_analysis.gui.main_window import run_gui
             run_gui()
         except KeyboardInterrupt:
             print("\nApplication terminated by user")
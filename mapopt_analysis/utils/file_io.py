@@ -4,21 +4,31 @@ File I/O utilities for MAPopt Analysis Tool
 """
 
 import os
+import importlib.util
+from datetime import datetime
 import pandas as pd
 import numpy as np
-from datetime import datetime
 from typing import Dict, Any, Optional
 
+# Columnar Parquet export is offered when pyarrow is installed (checked without importing it)
+_HAS_PYARROW = importlib.util.find_spec("pyarrow") is not None
+
 
 class FileManager:
     """Handles file input/output operations"""
     
+    @staticmethod
+    def analysis_datetime() -> str:
+        """Current local date/time as written to result files"""
+        return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        
     @staticmethod
     def save_burden_metrics(
         results: Dict[str, float],
         subject_id: str,
         file_path: str,
-        save_dir: str
+        save_dir: str,
+        analysis_datetime: Optional[str] = None
     ) -> str:
         """
         Save burden metrics to CSV file
@@ -28,6 +38,9 @@ class FileManager:
             subject_id: Subject identifier
             file_path: Original data file path
             save_dir: Directory to save results
+            analysis_datetime: Timestamp to record (see analysis_datetime());
+                pass one value to every file of a save so they match. Defaults
+                to the current time
             
         Returns:
             Path to saved file
@@ -38,7 +51,7 @@ class FileManager:
             'EndTime_hr': results['t_end_hr'],
             'TimeBurden_percent': results['time_burden'],
             'AreaBurdenRatio_percent': results['area_burden_ratio'],
-            'Analysis_DateTime': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'Analysis_DateTime': analysis_datetime or FileManager.analysis_datetime(),
             'DataFile': os.path.basename(file_path)
         }])
         
@@ -57,10 +70,11 @@ class FileManager:
         deviation: np.ndarray,
         outside_bounds: np.ndarray,
         subject_id: str,
-        save_dir: str
+        save_dir: str,
+        fmt: str = 'csv'
     ) -> str:
         """
-        Save time series data to CSV file
+        Save time series data to CSV, Parquet or NumPy archive file
         
         Args:
             time_vector: Analysis time vector
@@ -72,35 +86,94 @@ class FileManager:
             outside_bounds: Boolean array for bound violations
             subject_id: Subject identifier
             save_dir: Directory to save results
+            fmt: 'csv' for text output, 'parquet' for a columnar file (needs
+                pyarrow), or 'npz' for a compressed binary archive (one array
+                per column, bound flags bit-packed; read it back with
+                load_timeseries_npz)
             
         Returns:
             Path to saved file
+            
+        Raises:
+            ValueError: If fmt is not supported
         """
         # Interpolate COx and MAP to analysis time vector
         cox_interp = np.interp(time_vector, cox_time, cox_values) if len(cox_time) > 0 else np.full_like(time_vector, np.nan)
         map_interp = np.interp(time_vector, data['time'], data['MAP'])
         
-        timeseries_df = pd.DataFrame({
+        columns = {
             'Time_hr': time_vector,
             'COx': cox_interp,
             'MAP_mmHg': map_interp,
             'MAPopt_mmHg': mapopt_filled,
             'Deviation_mmHg': deviation,
-            'OutsideBounds': outside_bounds.astype(int)
-        })
+            'OutsideBounds': np.asarray(outside_bounds, dtype=np.uint8)
+        }
         
-        timeseries_file = os.path.join(save_dir, f'COx_MAPopt_timeseries_Sub{subject_id}.csv')
-        timeseries_df.to_csv(timeseries_file, index=False)
+        base_name = os.path.join(save_dir, f'COx_MAPopt_timeseries_Sub{subject_id}')
+        if fmt == 'npz':
+            timeseries_file = f'{base_name}.npz'
+            columns['OutsideBounds'] = np.packbits(columns['OutsideBounds'])  # 8 flags per byte
+            np.savez_compressed(timeseries_file, **columns)
+        else:
+            timeseries_file = FileManager._write_table(pd.DataFrame(columns), base_name, fmt)
         
         return timeseries_file
         
+    @staticmethod
+    def load_timeseries_npz(file_path: str) -> Dict[str, np.ndarray]:
+        """
+        Load a time series archive written by save_timeseries_data(fmt='npz')
+        
+        Args:
+            file_path: Path to .npz file
+            
+        Returns:
+            Dictionary of column arrays, with OutsideBounds unpacked to 0/1 values
+        """
+        with np.load(file_path) as archive:
+            columns = {key: archive[key] for key in archive.files}
+            
+        columns['OutsideBounds'] = np.unpackbits(columns['OutsideBounds'], count=len(columns['Time_hr']))
+        return columns
+        
+    @staticmethod
+    def _write_table(df: pd.DataFrame, base_name: str, fmt: str) -> str:
+        """
+        Write a DataFrame to base_name plus the extension for fmt
+        
+        Args:
+            df: Table to write
+            base_name: Output path without extension
+            fmt: 'csv' or 'parquet'
+            
+        Returns:
+            Path to saved file
+            
+        Raises:
+            ValueError: If fmt is not supported or pyarrow is missing for Parquet
+        """
+        if fmt == 'parquet':
+            if not _HAS_PYARROW:
+                raise ValueError("Parquet export requires pyarrow to be installed")
+            file_path = f'{base_name}.parquet'
+            df.to_parquet(file_path, compression='snappy', index=False)
+        elif fmt == 'csv':
+            file_path = f'{base_name}.csv'
+            df.to_csv(file_path, index=False)
+        else:
+            raise ValueError(f"Unsupported export format: {fmt}")
+            
+        return file_path
+        
     @staticmethod
     def save_analysis_summary(
         data_summary: Dict[str, Any],
         calculation_summary: Dict[str, Any],
         burden_summary: Dict[str, Any],
         subject_id: str,
-        save_dir: str
+        save_dir: str,
+        analysis_datetime: Optional[str] = None
     ) -> str:
         """
         Save comprehensive analysis summary
@@ -111,13 +184,14 @@ class FileManager:
             burden_summary: Burden metrics summary
             subject_id: Subject identifier
             save_dir: Directory to save results
+            analysis_datetime: Timestamp to record; defaults to the current time
             
         Returns:
             Path to saved file
         """
         summary = {
             'Subject_ID': subject_id,
-            'Analysis_DateTime': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            'Analysis_DateTime': analysis_datetime or FileManager.analysis_datetime()
         }
         
         # Add data summary with prefix
@@ -143,7 +217,8 @@ class FileManager:
         all_fits_data: list,
         time_vector: np.ndarray,
         subject_id: str,
-        save_dir: str
+        save_dir: str,
+        fmt: str = 'csv'
     ) -> str:
         """
         Save curve fitting data for detailed analysis
@@ -153,33 +228,41 @@ class FileManager:
             time_vector: Analysis time vector
             subject_id: Subject identifier
             save_dir: Directory to save results
+            fmt: 'csv' or 'parquet' (needs pyarrow)
             
         Returns:
-            Path to saved file
+            Path to saved file, or "" if there are no fits
+            
+        Raises:
+            ValueError: If fmt is not supported
         """
-        fits_records = []
+        # Output column -> fit dict key; the table is built column by column
+        # as arrays rather than as one dict per fit row
+        fit_columns = {
+            'Window_hr': 'win_hr',
+            'History_hr': 'hist_hr',
+            'MAPopt': 'mapopt',
+            'Nadir_COx': 'nadir_cox',
+            'R_squared': 'r2',
+            'Weight': 'weight'
+        }
+        counts = np.fromiter(map(len, all_fits_data), dtype=np.intp, count=len(all_fits_data))
+        total = int(counts.sum())
         
-        for t_idx, time_point in enumerate(time_vector):
-            fits = all_fits_data[t_idx]
-            
-            for fit_idx, fit in enumerate(fits):
-                record = {
-                    'Time_hr': time_point,
-                    'Fit_Index': fit_idx,
-                    'Window_hr': fit['win_hr'],
-                    'History_hr': fit['hist_hr'],
-                    'MAPopt': fit['mapopt'],
-                    'Nadir_COx': fit['nadir_cox'],
-                    'R_squared': fit['r2'],
-                    'Weight': fit['weight']
-                }
-                fits_records.append(record)
+        if total > 0:
+            # Time and per-time fit index expand from the fit counts; values come from one flat pass
+            flat_fits = [fit for fits in all_fits_data for fit in fits]
+            columns = {
+                'Time_hr': np.repeat(time_vector, counts),
+                'Fit_Index': np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+            }
+            for name, key in fit_columns.items():
+                columns[name] = np.array([fit[key] for fit in flat_fits])  # dtype inferred, as pandas did
                 
-        if fits_records:
-            fits_df = pd.DataFrame(fits_records)
-            fits_file = os.path.join(save_dir, f'Curve_fits_Sub{subject_id}.csv')
-            fits_df.to_csv(fits_file, index=False)
-            return fits_file
+            fits_df = pd.DataFrame(columns)
+            return FileManager._write_table(
+                fits_df, os.path.join(save_dir, f'Curve_fits_Sub{subject_id}'), fmt
+            )
         else:
             return ""
             
@@ -215,25 +298,19 @@ class FileManager:
             True if directory is valid and writable
         """
         try:
-            if not os.path.exists(save_dir):
-                os.makedirs(save_dir)
-            
-            # Test write permissions
-            test_file = os.path.join(save_dir, 'test_write.tmp')
-            with open(test_file, 'w') as f:
-                f.write('test')
-            os.remove(test_file)
-            
-            return True
-        except Exception:
+            os.makedirs(save_dir, exist_ok=True)
+        except OSError:
             return False
             
+        # Check write permission without creating a probe file
+        return os.path.isdir(save_dir) and os.access(save_dir, os.W_OK)
+            
     @staticmethod
     def get_supported_formats() -> Dict[str, list]:
         """Get supported file formats for import and export"""
         return {
             'import': ['.csv', '.txt'],
-            'export_data': ['.csv'],
+            'export_data': ['.csv', '.npz'] + (['.parquet'] if _HAS_PYARROW else []),
             'export_figures': ['.png', '.pdf', '.svg', '.eps']
         }
         
@@ -241,7 +318,8 @@ class FileManager:
     def create_results_manifest(
         save_dir: str,
         subject_id: str,
-        saved_files: list
+        saved_files: list,
+        analysis_datetime: Optional[str] = None
     ) -> str:
         """
         Create a manifest file listing all saved results
@@ -250,27 +328,31 @@ class FileManager:
             save_dir: Directory containing results
             subject_id: Subject identifier
             saved_files: List of saved file paths
+            analysis_datetime: Timestamp to record; defaults to the current time
             
         Returns:
             Path to manifest file
         """
         manifest_data = {
             'Subject_ID': subject_id,
-            'Analysis_DateTime': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'Analysis_DateTime': analysis_datetime or FileManager.analysis_datetime(),
             'Total_Files': len(saved_files),
             'Files': saved_files
         }
         
         manifest_file = os.path.join(save_dir, f'Results_manifest_Sub{subject_id}.txt')
         
+        lines = [
+            "MAPopt Analysis Results Manifest\n",
+            f"Subject ID: {subject_id}\n",
+            f"Analysis Date/Time: {manifest_data['Analysis_DateTime']}\n",
+            f"Total Files: {manifest_data['Total_Files']}\n\n",
+            "Generated Files:\n"
+        ]
+        lines.extend(f"{i}. {os.path.basename(file_path)}\n" for i, file_path in enumerate(saved_files, 1))
+        
+        # Single write of the assembled text
         with open(manifest_file, 'w') as f:
-            f.write(f"MAPopt Analysis Results Manifest\n")
-            f.write(f"Subject ID: {subject_id}\n")
-            f.write(f"Analysis Date/Time: {manifest_data['Analysis_DateTime']}\n")
-            f.write(f"Total Files: {manifest_data['Total_Files']}\n\n")
-            f.write("Generated Files:\n")
+            f.write("".join(lines))
             
-            for i, file_path in enumerate(saved_files, 1):
-                f.write(f"{i}. {os.path.basename(file_path)}\n")
-                
         return manifest_file
\ No newline at end of file
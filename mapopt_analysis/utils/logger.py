@@ -5,7 +5,7 @@ Simple logging utilities for MAPopt Analysis Tool
 
 import logging
 import sys
-from datetime import datetime
+import time
 from typing import Optional, Callable
 
 
@@ -39,45 +39,38 @@ class AnalysisLogger:
         """Set callback function for GUI logging"""
         self.gui_callback = callback
         
+    def is_active(self, level: int) -> bool:
+        """Whether a message at level would reach the console or the GUI"""
+        return self.gui_callback is not None or self.logger.isEnabledFor(level)
+        
+    def _log(self, level: int, message: str, emoji: str):
+        """Send message to the logger (if level is enabled) and the GUI callback"""
+        if self.logger.isEnabledFor(level):
+            self.logger.log(level, "%s", message)
+            
+        # Emoji-prefixed text is only built when a GUI is listening
+        if self.gui_callback is not None:
+            self.gui_callback(f"{emoji} {message}")
+        
     def info(self, message: str, emoji: str = "ℹ️"):
         """Log info message"""
-        formatted_message = f"{emoji} {message}"
-        self.logger.info(message)
-        
-        if self.gui_callback:
-            self.gui_callback(formatted_message)
+        self._log(logging.INFO, message, emoji)
             
     def error(self, message: str, emoji: str = "❌"):
         """Log error message"""
-        formatted_message = f"{emoji} {message}"
-        self.logger.error(message)
-        
-        if self.gui_callback:
-            self.gui_callback(formatted_message)
+        self._log(logging.ERROR, message, emoji)
             
     def warning(self, message: str, emoji: str = "⚠️"):
         """Log warning message"""
-        formatted_message = f"{emoji} {message}"
-        self.logger.warning(message)
-        
-        if self.gui_callback:
-            self.gui_callback(formatted_message)
+        self._log(logging.WARNING, message, emoji)
             
     def success(self, message: str, emoji: str = "✅"):
         """Log success message"""
-        formatted_message = f"{emoji} {message}"
-        self.logger.info(message)
-        
-        if self.gui_callback:
-            self.gui_callback(formatted_message)
+        self._log(logging.INFO, message, emoji)
             
     def debug(self, message: str, emoji: str = "🔍"):
         """Log debug message"""
-        formatted_message = f"{emoji} {message}"
-        self.logger.debug(message)
-        
-        if self.gui_callback:
-            self.gui_callback(formatted_message)
+        self._log(logging.DEBUG, message, emoji)
 
 
 class ProgressTracker:
@@ -87,11 +80,14 @@ class ProgressTracker:
         self.total_steps = total_steps
         self.current_step = 0
         self.logger = logger
-        self.start_time = datetime.now()
+        self.start_time = time.perf_counter()
         
     def update(self, step: int, message: str = ""):
         """Update progress"""
         self.current_step = step
+        if not self.logger.is_active(logging.INFO):
+            return  # Nothing would be shown; skip building the message
+            
         progress_pct = (step / self.total_steps) * 100
         
         if message:
@@ -105,8 +101,8 @@ class ProgressTracker:
         
     def finish(self, message: str = "Operation completed"):
         """Mark operation as finished"""
-        elapsed = datetime.now() - self.start_time
-        self.logger.success(f"{message} (took {elapsed.total_seconds():.1f}s)")
+        elapsed = time.perf_counter() - self.start_time
+        self.logger.success(f"{message} (took {elapsed:.1f}s)")
 
 
 # Global logger instance
@@ -4,14 +4,18 @@ Plotting and visualization module for MAPopt Analysis
 """
 
 import numpy as np
-import pandas as pd
-import matplotlib.pyplot as plt
-import matplotlib.patches as patches
+import matplotlib as mpl
+from matplotlib.collections import PolyCollection
 from matplotlib.figure import Figure
-from typing import Optional, Tuple, List, Dict, Any
+from typing import Optional, Tuple, List, Dict, Any, TYPE_CHECKING
 
 from ..config import COX_UPPER_THRESHOLD, COX_LOWER_THRESHOLD, PLOT_DPI
 
+# pyplot is not needed: figures are created directly and attached to a canvas
+# by the caller, so importing this module selects no backend
+if TYPE_CHECKING:
+    import pandas as pd
+
 
 class PlotManager:
     """Manages plotting and visualization for MAPopt analysis"""
@@ -19,10 +23,15 @@ class PlotManager:
     def __init__(self):
         self.fig = None
         self.axes = None
+        self.canvas = None
+        self._title = None
+        self._time_lines = []
+        self._background = None
+        self._draw_cid = None
         
     def create_main_analysis_plots(
         self,
-        data: pd.DataFrame,
+        data: 'pd.DataFrame',
         cox_time: np.ndarray,
         cox_values: np.ndarray,
         time_vector: np.ndarray,
@@ -30,7 +39,8 @@ class PlotManager:
         deviation: np.ndarray,
         outside_upper: np.ndarray,
         outside_lower: np.ndarray,
-        subject_id: str
+        subject_id: str,
+        fig: Optional[Figure] = None
     ) -> Figure:
         """
         Create the main 4-panel analysis plot
@@ -44,17 +54,35 @@ class PlotManager:
             deviation: Deviation from MAPopt
             outside_upper/lower: Boolean arrays for bound violations
             subject_id: Subject identifier
+            fig: Existing figure to clear and redraw into (e.g. one already
+                embedded in a GUI canvas); a new figure is created if None
             
         Returns:
             Matplotlib Figure object
         """
-        # Create figure
-        self.fig = Figure(figsize=(14, 10))
-        self.axes = []
-        
-        for i in range(4):
-            ax = self.fig.add_subplot(4, 1, i+1)
-            self.axes.append(ax)
+        # Create figure, or reuse the given one along with its canvas
+        if fig is None:
+            self.fig = Figure(figsize=(14, 10))
+            self.canvas = None
+            self._draw_cid = None
+        elif fig is self.fig and self.axes is not None and len(self.axes) == 4:
+            # Re-plot into this figure's existing panels; default margins give
+            # tight_layout the same starting point as for a new figure
+            for ax in self.axes:
+                ax.clear()
+            self.fig.subplots_adjust(**{
+                side: mpl.rcParams[f'figure.subplot.{side}']
+                for side in ('left', 'right', 'bottom', 'top', 'wspace', 'hspace')
+            })
+        else:
+            fig.clear()
+            self.fig = fig
+            self.axes = None
+        self._time_lines = []
+        self._background = None
+        
+        if self.axes is None or fig is None:
+            self.axes = [self.fig.add_subplot(4, 1, i+1) for i in range(4)]
         
         # Plot 1: COx vs Time
         self._plot_cox_correlations(cox_time, cox_values)
@@ -74,9 +102,12 @@ class PlotManager:
             ax.set_xlim([x_min, x_max])
             
         # Set title
-        self.fig.suptitle(f'Subject {subject_id} - MAPopt Analysis', fontsize=14)
+        self._title = self.fig.suptitle(f'Subject {subject_id} - MAPopt Analysis', fontsize=14)
         self.fig.tight_layout()
         
+        # Once attached to a GUI canvas the title is animated (see attach_canvas)
+        self._title.set_animated(self.canvas is not None)
+        
         return self.fig
         
     def _plot_cox_correlations(self, cox_time: np.ndarray, cox_values: np.ndarray):
@@ -90,29 +121,21 @@ class PlotManager:
         ax.axhline(y=COX_UPPER_THRESHOLD, color='r', linestyle='--', alpha=0.7)
         ax.axhline(y=-COX_UPPER_THRESHOLD, color='r', linestyle='--', alpha=0.7)
         
-        ax.set_ylabel('COx')
-        ax.set_title('(a) COx vs Time')
-        ax.set_ylim([-1, 1])
-        ax.grid(True, alpha=0.3)
+        self._style_panel(ax, 'COx', '(a) COx vs Time', [-1, 1])
         
-    def _plot_map_timeseries(self, data: pd.DataFrame):
+    def _plot_map_timeseries(self, data: 'pd.DataFrame'):
         """Plot MAP time series"""
         ax = self.axes[1]
         
         ax.plot(data['time'], data['MAP'], '-b', linewidth=1)
-        ax.set_ylabel('MAP [mmHg]')
-        ax.set_title('(b) MAP vs Time')
-        ax.grid(True, alpha=0.3)
+        self._style_panel(ax, 'MAP [mmHg]', '(b) MAP vs Time')
         
     def _plot_mapopt_timeseries(self, time_vector: np.ndarray, mapopt_filled: np.ndarray):
         """Plot MAPopt time series"""
         ax = self.axes[2]
         
         ax.plot(time_vector, mapopt_filled, '-r', linewidth=1.5)
-        ax.set_ylabel('MAPopt [mmHg]')
-        ax.set_title('(c) Optimal MAP vs Time')
-        ax.set_ylim([40, 100])
-        ax.grid(True, alpha=0.3)
+        self._style_panel(ax, 'MAPopt [mmHg]', '(c) Optimal MAP vs Time', [40, 100])
         
     def _plot_deviation(
         self, 
@@ -135,9 +158,15 @@ class PlotManager:
         self._fill_burden_areas(ax, time_vector, deviation, outside_upper, outside_lower)
         
         ax.set_xlabel('Time [hr]')
-        ax.set_ylabel('Deviation [mmHg]')
-        ax.set_title('(d) Deviation from MAPopt')
-        ax.set_ylim([-30, 30])
+        self._style_panel(ax, 'Deviation [mmHg]', '(d) Deviation from MAPopt', [-30, 30])
+        
+    @staticmethod
+    def _style_panel(ax, ylabel: str, title: str, ylim: Optional[List[float]] = None):
+        """Apply the shared label, title, y-limits and grid of a time series panel"""
+        ax.set_ylabel(ylabel)
+        ax.set_title(title)
+        if ylim is not None:
+            ax.set_ylim(ylim)
         ax.grid(True, alpha=0.3)
         
     def _fill_burden_areas(
@@ -149,35 +178,88 @@ class PlotManager:
         outside_lower: np.ndarray
     ):
         """Fill areas representing burden outside safe bounds"""
-        for i in range(len(time_vector)-1):
-            if outside_upper[i]:
-                x = [time_vector[i], time_vector[i+1], 
-                     time_vector[i+1], time_vector[i]]
-                y = [5, 5, deviation[i+1], deviation[i]]
-                ax.fill(x, y, 'r', alpha=0.3)
+        for outside, bound, color in ((outside_upper, 5, 'r'), (outside_lower, -5, 'b')):
+            idx = np.flatnonzero(outside[:-1])
+            if len(idx) == 0:
+                continue
                 
-            if outside_lower[i]:
-                x = [time_vector[i], time_vector[i+1], 
-                     time_vector[i+1], time_vector[i]]
-                y = [-5, -5, deviation[i+1], deviation[i]]
-                ax.fill(x, y, 'b', alpha=0.3)
+            # One quad per flagged interval [i, i+1], from the bound to the deviation,
+            # all drawn by a single collection
+            verts = np.empty((len(idx), 4, 2))
+            verts[:, 0, 0] = verts[:, 3, 0] = time_vector[idx]
+            verts[:, 1, 0] = verts[:, 2, 0] = time_vector[idx + 1]
+            verts[:, 0:2, 1] = bound
+            verts[:, 2, 1] = deviation[idx + 1]
+            verts[:, 3, 1] = deviation[idx]
+            ax.add_collection(PolyCollection(verts, facecolors=color, alpha=0.3))
                 
+    def attach_canvas(self, canvas):
+        """
+        Enable blitted updates of the title and time indicators on a GUI canvas
+        
+        Args:
+            canvas: Canvas displaying the main analysis figure
+        """
+        if self._draw_cid is not None:
+            canvas.mpl_disconnect(self._draw_cid)
+        self.canvas = canvas
+        self._background = None
+        self._draw_cid = canvas.mpl_connect('draw_event', self._on_draw)
+        
+        # Title and time indicators change on every burden update, so they are
+        # animated: drawn over a cached background instead of re-rendering the
+        # figure. Without a canvas they stay ordinary artists, so a plain
+        # savefig still includes them.
+        if self._title is not None:
+            self._title.set_animated(True)
+        for line in self._time_lines:
+            line.set_animated(True)
+        
+    def _on_draw(self, event):
+        """Cache the rendered background and paint the animated artists over it"""
+        if event.canvas.is_saving():
+            # Axes draw their animated lines when saving, but figure-level text is skipped
+            self._title.draw(event.renderer)
+            return
+            
+        self._background = self.canvas.copy_from_bbox(self.fig.bbox)
+        self._draw_animated()
+        
+    def _draw_animated(self):
+        """Draw the title and time indicator lines"""
+        self.fig.draw_artist(self._title)
+        for line in self._time_lines:
+            self.fig.draw_artist(line)
+            
+    def blit(self):
+        """Redraw only the animated artists over the cached background"""
+        if self.canvas is None:
+            return
+        if self._background is None:
+            self.canvas.draw_idle()  # No full draw yet; _on_draw will paint them
+            return
+            
+        self.canvas.restore_region(self._background)
+        self._draw_animated()
+        self.canvas.blit(self.fig.bbox)
+        
     def update_time_indicators(self, t_start: float, t_end: float):
         """Update time indicator lines on all plots"""
         if self.axes is None:
             return
             
-        for ax in self.axes:
-            # Remove existing indicator lines
-            lines_to_remove = [line for line in ax.lines if hasattr(line, '_time_indicator')]
-            for line in lines_to_remove:
-                line.remove()
+        if not self._time_lines:
+            # Two indicator lines per axis, created once and moved afterwards
+            for ax in self.axes:
+                for t in (t_start, t_end):
+                    line = ax.axvline(x=t, color='blue', linestyle='--', linewidth=2,
+                                      alpha=0.7, animated=self.canvas is not None)
+                    self._time_lines.append(line)
+            return
             
-            # Add new indicator lines
-            line1 = ax.axvline(x=t_start, color='blue', linestyle='--', linewidth=2, alpha=0.7)
-            line2 = ax.axvline(x=t_end, color='blue', linestyle='--', linewidth=2, alpha=0.7)
-            line1._time_indicator = True
-            line2._time_indicator = True
+        for i, line in enumerate(self._time_lines):
+            t = t_start if i % 2 == 0 else t_end
+            line.set_xdata([t, t])
             
     def create_curve_fits_plot(
         self, 
@@ -195,27 +277,32 @@ class PlotManager:
             Matplotlib Figure object
         """
         # Calculate weighted average
-        all_mapopts = [fit['mapopt'] for fit in fits]
-        all_weights = [fit['weight'] for fit in fits]
-        weighted_mapopt = np.sum(np.array(all_mapopts) * np.array(all_weights)) / np.sum(all_weights)
+        all_mapopts = np.fromiter((fit['mapopt'] for fit in fits), dtype=np.float64, count=len(fits))
+        all_weights = np.fromiter((fit['weight'] for fit in fits), dtype=np.float64, count=len(fits))
+        weighted_mapopt = np.average(all_mapopts, weights=all_weights)
         
-        # Sort fits by weight
-        fits_sorted = sorted(fits, key=lambda x: x['weight'], reverse=True)
+        # Up to 15 fits by descending weight (equal weights keep their input order)
+        top = np.argsort(-all_weights, kind='stable')[:15]
+        fits_sorted = [fits[i] for i in top]
         
         # Create figure
         fig = Figure(figsize=(15, 10))
         
         # Individual fit subplots
-        max_fits = min(15, len(fits_sorted))
+        max_fits = len(fits_sorted)
         rows, cols = 3, 5
         
+        # Fitted curves for every fit shown below, evaluated in one batch
+        curve_x, curve_y = self._fitted_curves(fits_sorted[:max_fits])
+        
         for i in range(max_fits):
             ax = fig.add_subplot(rows, cols, i+1)
-            self._plot_single_curve_fit(ax, fits_sorted[i])
+            self._plot_single_curve_fit(ax, fits_sorted[i], curve_x[i], curve_y[i])
             
         # Summary plots
         if max_fits == 15:
-            self._plot_curve_summary(fig, fits_sorted, weighted_mapopt, all_mapopts, all_weights)
+            self._plot_curve_summary(fig, fits_sorted, curve_x, curve_y,
+                                     weighted_mapopt, all_mapopts, all_weights)
             
         fig.suptitle(
             f'Curve Fits at {actual_time:.2f} hours | Weighted MAPopt = {weighted_mapopt:.1f} mmHg',
@@ -225,19 +312,37 @@ class PlotManager:
         
         return fig
         
-    def _plot_single_curve_fit(self, ax, fit: Dict[str, Any]):
-        """Plot individual curve fit"""
+    @staticmethod
+    def _fitted_curves(fits: List[Dict[str, Any]], num_points: int = 100) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Evaluate the fitted curves of several fits in one batch
+        
+        Args:
+            fits: Curve fit data dictionaries
+            num_points: Points per curve
+            
+        Returns:
+            Tuple of (x, y) arrays of shape (len(fits), num_points): MAP spanning each
+            fit's bins padded by 5 mmHg (within 40-90), and COx on the original scale
+        """
+        lo = np.array([max(40, np.min(fit['bin_centers']) - 5) for fit in fits], dtype=np.float64)
+        hi = np.array([min(90, np.max(fit['bin_centers']) + 5) for fit in fits], dtype=np.float64)
+        x = np.linspace(lo, hi, num_points, axis=1)
+        coeffs = np.array([fit['coeffs'] for fit in fits], dtype=np.float64).reshape(len(fits), -1)
+        
+        # Horner's scheme for all polynomials at once (the same steps as np.polyval)
+        y = np.zeros_like(x)
+        for c in coeffs.T:
+            y = y * x + c[:, None]
+            
+        return x, np.tanh(y)  # Inverse Fisher transform
+        
+    def _plot_single_curve_fit(self, ax, fit: Dict[str, Any], x_range: np.ndarray, y_orig: np.ndarray):
+        """Plot individual curve fit with its precomputed fitted curve"""
         # Plot data points
         ax.scatter(fit['bin_centers'], fit['binned_cox'], s=30, c='blue', alpha=0.6)
         
         # Plot fitted curve
-        x_range = np.linspace(
-            max(40, np.min(fit['bin_centers']) - 5),
-            min(90, np.max(fit['bin_centers']) + 5), 
-            100
-        )
-        y_fisher = np.polyval(fit['coeffs'], x_range)
-        y_orig = np.tanh(y_fisher)  # Inverse Fisher transform
         ax.plot(x_range, y_orig, 'r-', linewidth=2)
         
         # Mark optimal point
@@ -259,28 +364,22 @@ class PlotManager:
         self, 
         fig: Figure, 
         fits_sorted: List[Dict],
+        curve_x: np.ndarray,
+        curve_y: np.ndarray,
         weighted_mapopt: float,
-        all_mapopts: List[float],
-        all_weights: List[float]
+        all_mapopts: np.ndarray,
+        all_weights: np.ndarray
     ):
         """Plot summary curves and histogram"""
         rows, cols = 3, 5
         
         # All curves overlay
         ax_summary = fig.add_subplot(rows, cols, rows*cols-1)
-        colors = plt.cm.viridis(np.linspace(0, 1, min(8, len(fits_sorted))))
+        colors = mpl.colormaps['viridis'](np.linspace(0, 1, min(8, len(fits_sorted))))
         
         for i, fit in enumerate(fits_sorted[:8]):
-            x_range = np.linspace(
-                max(40, np.min(fit['bin_centers']) - 5),
-                min(90, np.max(fit['bin_centers']) + 5), 
-                100
-            )
-            y_fisher = np.polyval(fit['coeffs'], x_range)
-            y_orig = np.tanh(y_fisher)
-            
-            alpha = 0.4 + 0.6 * (fit['weight'] / max(all_weights))
-            ax_summary.plot(x_range, y_orig, color=colors[i], linewidth=2, alpha=alpha)
+            alpha = 0.4 + 0.6 * (fit['weight'] / all_weights.max())
+            ax_summary.plot(curve_x[i], curve_y[i], color=colors[i], linewidth=2, alpha=alpha)
         
         ax_summary.axvline(x=weighted_mapopt, color='black', linewidth=3,
                          label=f'Weighted MAPopt = {weighted_mapopt:.1f}')
@@ -294,7 +393,7 @@ class PlotManager:
         
         # MAPopt histogram
         ax_hist = fig.add_subplot(rows, cols, rows*cols)
-        weights_normalized = np.array(all_weights) / np.sum(all_weights)
+        weights_normalized = all_weights / np.sum(all_weights)
         ax_hist.hist(all_mapopts, bins=np.arange(40, 95, 5), 
                     weights=weights_normalized, alpha=0.7, 
                     color='skyblue', edgecolor='black')
@@ -0,0 +1,23 @@
+"""
+Shared test fixtures
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+
+@pytest.fixture
+def recording():
+    """Synthetic 2.5 hr recording, ~10 s irregular sampling, autoregulating around 70 mmHg"""
+    rng = np.random.default_rng(21)
+    n = 900
+    t = np.concatenate(([0.0], np.cumsum(rng.uniform(8, 12, n - 1)))) / 3600
+    MAP = 70 + 15 * np.sin(2 * np.pi * t / 0.7) + rng.normal(0, 2, n)
+
+    # rSO2 falls slightly with MAP inside 62-78 mmHg and follows it passively outside
+    deviation = MAP - 70
+    rSO2 = 60 + np.where(np.abs(deviation) < 8, -0.3 * deviation, 0.5 * deviation) + rng.normal(0, 1, n)
+    MAP[rng.choice(n, 10, replace=False)] = np.nan
+    rSO2[rng.choice(n, 10, replace=False)] = np.nan
+    return pd.DataFrame({'time': t, 'MAP': MAP, 'rSO2': rSO2})
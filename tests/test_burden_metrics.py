@@ -0,0 +1,70 @@
+"""
+Tests for the burden metrics module
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.integrate import trapezoid
+
+from mapopt_analysis.core.burden_metrics import BurdenCalculator
+
+
+def _reference_burden(calc, time_vector, t_start, t_end):
+    """Time and area burden of one window computed directly over its samples"""
+    t_start = max(t_start, time_vector[0])
+    t_end = min(t_end, time_vector[-1])
+    idx = (time_vector >= t_start) & (time_vector <= t_end)
+    if not np.any(idx):
+        return 0.0, 0.0
+
+    time_burden = np.sum(calc.outside_bounds[idx]) / np.sum(idx) * 100
+    area_outside = trapezoid(calc.excess_above[idx] + calc.excess_below[idx], time_vector[idx])
+    area_safe = trapezoid(calc.upper_bound[idx] - calc.lower_bound[idx], time_vector[idx])
+    area_burden = area_outside / area_safe * 100 if area_safe > 0 else 0.0
+    return time_burden, area_burden
+
+
+def _calculator(mapopt_nan_at=()):
+    """Burden calculator on synthetic data crossing both bounds"""
+    rng = np.random.default_rng(3)
+    time_vector = np.arange(0, 24, 1 / 60)
+    data = pd.DataFrame({
+        'time': time_vector,
+        'MAP': 70 + 12 * np.sin(time_vector * 2) + rng.normal(0, 2, len(time_vector)),
+        'rSO2': 65.0
+    })
+    mapopt = 70 + 3 * np.cos(time_vector / 3)
+    mapopt[list(mapopt_nan_at)] = np.nan
+
+    calc = BurdenCalculator()
+    calc.calculate_deviation_and_burden(data, time_vector, mapopt)
+    return calc, time_vector
+
+
+@pytest.mark.parametrize('mapopt_nan_at', [(), (600, 601, 1000)])
+def test_burden_matches_direct_trapezoid(mapopt_nan_at):
+    calc, time_vector = _calculator(mapopt_nan_at)
+    assert np.any(calc.outside_upper) and np.any(calc.outside_lower)
+
+    rng = np.random.default_rng(11)
+    for t_start, t_end in np.sort(rng.uniform(-1, 25, (300, 2)), axis=1):
+        result = calc.calculate_burden_metrics(time_vector, t_start, t_end)
+        time_burden, area_burden = _reference_burden(calc, time_vector, t_start, t_end)
+        assert result['time_burden'] == pytest.approx(time_burden, abs=1e-9)
+        assert result['area_burden_ratio'] == pytest.approx(area_burden, rel=1e-9, abs=1e-9)
+
+
+def test_nan_mapopt_only_affects_windows_containing_it():
+    calc, time_vector = _calculator((600,))  # MAPopt missing at 10.0 hr
+
+    # Windows before and after the missing sample keep a real area burden
+    assert calc.calculate_burden_metrics(time_vector, 10.2, 12)['area_burden_ratio'] > 0
+    assert calc.calculate_burden_metrics(time_vector, 2, 9.9)['area_burden_ratio'] > 0
+    assert calc.calculate_burden_metrics(time_vector, 9.9, 10.1)['area_burden_ratio'] == 0.0
+
+
+def test_bound_masks_are_exclusive():
+    calc, _ = _calculator()
+    np.testing.assert_array_equal(calc.outside_bounds, calc.outside_upper | calc.outside_lower)
+    assert not np.any(calc.outside_upper & calc.outside_lower)
@@ -1 +1,129 @@
- 
+"""
+Tests for the data loading module
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from mapopt_analysis.core import data_loader
+from mapopt_analysis.core.data_loader import DataLoader
+
+
+@pytest.fixture
+def data_file(tmp_path):
+    """Small recording (time in minutes, MAP, rSO2) named after subject 17"""
+    rng = np.random.default_rng(1)
+    minutes = np.arange(300, dtype=float)
+    df = pd.DataFrame({
+        'time': minutes,
+        'MAP': 70 + 5 * np.sin(minutes / 20) + rng.normal(0, 1, len(minutes)),
+        'rSO2': 65 + rng.normal(0, 1, len(minutes))
+    })
+    path = tmp_path / 'Sub17_recording.csv'
+    df.to_csv(path, index=False)
+    return str(path)
+
+
+def test_load_data(data_file):
+    loader = DataLoader()
+    data = loader.load_data(data_file)
+
+    assert list(data.columns) == ['time', 'MAP', 'rSO2']
+    assert loader.subject_id == '17'
+    assert data['time'].iloc[-1] == pytest.approx(299 / 60)
+
+
+def test_is_loaded_tracks_path_and_mtime(data_file, tmp_path):
+    loader = DataLoader()
+    assert not loader.is_loaded(data_file)
+
+    loader.load_data(data_file)
+    assert loader.is_loaded(data_file)
+    assert not loader.is_loaded(str(tmp_path / 'other.csv'))
+
+    # A modified file must be reloaded
+    stat = os.stat(data_file)
+    os.utime(data_file, (stat.st_atime, stat.st_mtime + 10))
+    assert not loader.is_loaded(data_file)
+
+
+def test_failed_load_keeps_previous_file(data_file, tmp_path):
+    loader = DataLoader()
+    loader.load_data(data_file)
+
+    bad_file = tmp_path / 'Sub99_bad.csv'
+    bad_file.write_text('a,b\n1,2\n')
+    with pytest.raises(ValueError):
+        loader.load_data(str(bad_file))
+
+    assert loader.subject_id == '17'
+    assert loader.is_loaded(data_file)
+
+
+def test_read_csv_falls_back_to_c_engine(data_file, monkeypatch):
+    read_csv = pd.read_csv
+
+    def reject_pyarrow(path, engine=None, **kwargs):
+        if engine == 'pyarrow':
+            raise ValueError("Unknown engine: pyarrow")
+        return read_csv(path, engine=engine, **kwargs)
+
+    monkeypatch.setattr(data_loader, '_CSV_ENGINE', 'pyarrow')
+    monkeypatch.setattr(data_loader.pd, 'read_csv', reject_pyarrow)
+    assert DataLoader._read_csv(data_file).shape == (300, 3)
+
+
+def test_fix_monotonic_time():
+    data = pd.DataFrame({'time': [0.0, 1.0, 1.0, 0.5, 2.0, 3.0]})
+    DataLoader()._fix_monotonic_time(data)
+
+    # Repeated and decreasing samples are pushed just past their predecessor;
+    # samples already far enough ahead are left as is
+    np.testing.assert_allclose(
+        data['time'], [0.0, 1.0, 1.0 + 1e-6, 1.0 + 2e-6, 2.0, 3.0], rtol=0, atol=1e-12
+    )
+
+
+def test_handle_duplicates():
+    # Unique times are only sorted, so integer columns keep their dtype
+    data = pd.DataFrame({'time': [2.0, 0.0, 1.0], 'MAP': [72, 70, 71], 'rSO2': [62, 60, 61]})
+    result = DataLoader()._handle_duplicates(data)
+    np.testing.assert_array_equal(result['time'], [0.0, 1.0, 2.0])
+    np.testing.assert_array_equal(result['rSO2'], [60, 61, 62])
+    assert result['rSO2'].dtype == np.int64
+
+    # Repeated times are averaged into one sample
+    data = pd.DataFrame({'time': [1.0, 0.0, 1.0], 'MAP': [71, 70, 73], 'rSO2': [61, 60, 62]})
+    result = DataLoader()._handle_duplicates(data)
+    np.testing.assert_array_equal(result['time'], [0.0, 1.0])
+    np.testing.assert_array_equal(result['MAP'], [70.0, 72.0])
+    np.testing.assert_array_equal(result['rSO2'], [60.0, 61.5])
+
+
+def test_cache_is_bounded(data_file, tmp_path, monkeypatch):
+    cache_dir = tmp_path / 'cache'
+    monkeypatch.setattr(data_loader, 'CACHE_DIR', str(cache_dir))
+    monkeypatch.setattr(data_loader, 'CACHE_MAX_FILES', 2)
+
+    # Other pickles sharing the directory are never evicted
+    cache_dir.mkdir()
+    other = cache_dir / 'results.pkl'
+    other.write_bytes(b'not a cache entry')
+    os.utime(other, (0, 0))
+
+    for i in range(4):
+        copy = tmp_path / f'Sub{i}.csv'
+        copy.write_bytes(open(data_file, 'rb').read())
+        os.utime(copy, (1000 + i, 1000 + i))
+        DataLoader().load_data(str(copy))
+
+    assert len(list(cache_dir.glob('mapopt_*.pkl'))) == 2
+    assert other.exists()
+
+    # A cached load returns the same data as processing the file
+    cached = DataLoader().load_data(str(tmp_path / 'Sub3.csv'))
+    monkeypatch.setattr(data_loader, 'CACHE_DIR', None)
+    pd.testing.assert_frame_equal(cached, DataLoader().load_data(str(tmp_path / 'Sub3.csv')))
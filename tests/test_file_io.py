@@ -0,0 +1,65 @@
+"""
+Tests for the file I/O utilities
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from mapopt_analysis.utils.file_io import FileManager
+
+
+@pytest.fixture
+def timeseries():
+    """Inputs for save_timeseries_data, with a bound-flag count that is not a multiple of 8"""
+    rng = np.random.default_rng(5)
+    time_vector = np.arange(0, 2, 1 / 60)[:-3]
+    data = pd.DataFrame({
+        'time': np.linspace(0, 2, 500),
+        'MAP': 70 + rng.normal(0, 5, 500),
+        'rSO2': 65.0
+    })
+    return dict(
+        time_vector=time_vector,
+        cox_time=time_vector[::5],
+        cox_values=rng.uniform(-1, 1, len(time_vector[::5])),
+        data=data,
+        mapopt_filled=70 + rng.normal(0, 1, len(time_vector)),
+        deviation=rng.normal(0, 8, len(time_vector)),
+        outside_bounds=rng.random(len(time_vector)) < 0.3,
+        subject_id='42'
+    )
+
+
+def test_npz_round_trip_matches_csv(timeseries, tmp_path):
+    csv_file = FileManager.save_timeseries_data(**timeseries, save_dir=str(tmp_path))
+    npz_file = FileManager.save_timeseries_data(**timeseries, save_dir=str(tmp_path), fmt='npz')
+    assert npz_file.endswith('.npz')
+
+    loaded = FileManager.load_timeseries_npz(npz_file)
+    expected = pd.read_csv(csv_file)
+
+    # Same columns as the CSV; the archive keeps the exact float64 inputs
+    assert list(loaded) == list(expected.columns)
+    for column in expected.columns:
+        np.testing.assert_allclose(loaded[column], expected[column].to_numpy(), rtol=1e-12)
+    np.testing.assert_array_equal(loaded['Time_hr'], timeseries['time_vector'])
+    np.testing.assert_array_equal(loaded['MAPopt_mmHg'], timeseries['mapopt_filled'])
+    np.testing.assert_array_equal(loaded['Deviation_mmHg'], timeseries['deviation'])
+    np.testing.assert_array_equal(loaded['OutsideBounds'], timeseries['outside_bounds'])
+
+
+def test_unsupported_format_raises(timeseries, tmp_path):
+    with pytest.raises(ValueError):
+        FileManager.save_timeseries_data(**timeseries, save_dir=str(tmp_path), fmt='xlsx')
+
+
+def test_analysis_datetime_shared_across_files(tmp_path):
+    stamp = '2024-01-02 03:04:05'
+    results = {'t_start_hr': 1.0, 't_end_hr': 2.0, 'time_burden': 10.0, 'area_burden_ratio': 5.0}
+    burden_file = FileManager.save_burden_metrics(results, '42', 'Sub42.csv', str(tmp_path), stamp)
+    manifest_file = FileManager.create_results_manifest(str(tmp_path), '42', [burden_file], stamp)
+
+    assert pd.read_csv(burden_file)['Analysis_DateTime'][0] == stamp
+    with open(manifest_file) as f:
+        assert f"Analysis Date/Time: {stamp}" in f.read()
@@ -1 +1,133 @@
- 
+"""
+Tests for the MAPopt calculation module
+"""
+
+from unittest import mock
+
+import numpy as np
+import pytest
+
+from mapopt_analysis.config import (
+    MAP_BINS, MAP_BIN_CENTERS, COX_WINDOWS_MIN, HISTORY_WINDOWS_HR,
+    MAP_OPT_MIN, MAP_OPT_MAX, COX_WEIGHT_THRESHOLD,
+    MIN_DATA_POINTS, MIN_CORRELATION_POINTS, MIN_SEGMENT_POINTS
+)
+from mapopt_analysis.core import mapopt_calculator
+from mapopt_analysis.core.mapopt_calculator import MAPoptCalculator, GRID_STEP_HR
+
+
+def test_fit_quadratic_matches_polyfit():
+    rng = np.random.default_rng(7)
+    x = MAP_BIN_CENTERS.astype(np.float64)
+    num_rows = 200
+
+    # Random masks with at least three points per row
+    valid = rng.random((num_rows, len(x))) < 0.5
+    valid[:, :3] |= ~valid[:, :3].any(axis=1, keepdims=True) | (valid.sum(axis=1, keepdims=True) < 3)
+    y = 0.002 * (x - 65) ** 2 - 0.3 + rng.normal(0, 0.2, (num_rows, len(x)))
+
+    coeffs = MAPoptCalculator._fit_quadratic(x, np.where(valid, y, 0.0), valid)
+
+    for row in range(num_rows):
+        expected = np.polyfit(x[valid[row]], y[row, valid[row]], 2)
+        np.testing.assert_allclose(coeffs[row], expected, rtol=1e-7, atol=1e-10)
+
+
+def test_grid_index_exact_for_aligned_offsets():
+    assert MAPoptCalculator._grid_index(3 / 60 / 2) == 3
+    assert MAPoptCalculator._grid_index(12.0) == round(12.0 / GRID_STEP_HR)
+
+
+def test_grid_index_rejects_misaligned_offset():
+    with pytest.raises(ValueError):
+        MAPoptCalculator._grid_index(1.25 / 60)
+
+
+def test_validate_grid_config():
+    MAPoptCalculator._validate_grid_config()
+
+    with mock.patch.object(mapopt_calculator, 'COX_WINDOWS_MIN', [3, 2.5]):
+        with pytest.raises(ValueError):
+            MAPoptCalculator._validate_grid_config()
+
+
+def _reference_fit(t, MAP, rSO2, t_now, win_hr, hist_hr):
+    """
+    (mapopt, weight) of one curve fit, or None if rejected, computed window by
+    window with np.corrcoef and np.polyfit as in the original per-point loop
+    """
+    t_start = t_now - hist_hr
+    segment = (t >= t_start) & (t < t_now)
+    if t_start < t[0] or segment.sum() < MIN_SEGMENT_POINTS:
+        return None
+
+    cox_vals, map_vals = [], []
+    step_size = win_hr / 2
+    for s in range(int((hist_hr - win_hr) / step_size) + 1):
+        win_start = t_start + s * step_size
+        window = segment & (t >= win_start) & (t < win_start + win_hr)
+        x, y = MAP[window], rSO2[window]
+        complete = np.isfinite(x) & np.isfinite(y)
+        if len(x) < MIN_DATA_POINTS or complete.sum() < MIN_CORRELATION_POINTS:
+            continue
+        if np.ptp(x[complete]) == 0 or np.ptp(y[complete]) == 0:
+            continue
+        cox_vals.append(np.corrcoef(x[complete], y[complete])[0, 1])
+        map_vals.append(np.mean(x))
+    if len(cox_vals) < 5:
+        return None
+
+    # Mean correlation per MAP bin, Fisher transformed
+    cox_vals, map_vals = np.array(cox_vals), np.array(map_vals)
+    binned_cox = np.full(len(MAP_BIN_CENTERS), np.nan)
+    for b in range(len(MAP_BIN_CENTERS)):
+        in_bin = (map_vals >= MAP_BINS[b]) & (map_vals < MAP_BINS[b + 1])
+        if np.any(in_bin):
+            binned_cox[b] = np.mean(cox_vals[in_bin])
+    r = np.clip(binned_cox, -0.999, 0.999)
+    fisher = 0.5 * np.log((1 + r) / (1 - r))
+    valid = np.isfinite(fisher)
+    if valid.sum() < 3:
+        return None
+
+    x, y = MAP_BIN_CENTERS[valid], fisher[valid]
+    coeffs = np.polyfit(x, y, 2)
+    mapopt = np.clip(-coeffs[1] / (2 * coeffs[0]), x.min(), x.max())
+    if coeffs[0] <= 0 or not MAP_OPT_MIN <= mapopt <= MAP_OPT_MAX:
+        return None
+
+    r2 = 1 - np.sum((y - np.polyval(coeffs, x)) ** 2) / np.sum((y - y.mean()) ** 2)
+    nadir_cox = np.tanh(np.polyval(coeffs, mapopt))
+    if nadir_cox < 0:
+        weight = r2 * -nadir_cox
+    else:
+        weight = r2 * max(COX_WEIGHT_THRESHOLD - nadir_cox, 0) / COX_WEIGHT_THRESHOLD
+    return (mapopt, weight) if weight > 1e-6 else None
+
+
+def test_mapopt_series_matches_direct_fits(recording):
+    t, MAP, rSO2 = (recording[column].to_numpy() for column in ('time', 'MAP', 'rSO2'))
+
+    calc = MAPoptCalculator()
+    time_vector, _, all_fits_data = calc.calculate_mapopt_series(recording)
+
+    num_fits = 0
+    for k, t_now in enumerate(time_vector):
+        fits = [
+            fit for fit in (
+                _reference_fit(t, MAP, rSO2, t_now, cox_win_min / 60, hist_hr)
+                for cox_win_min in COX_WINDOWS_MIN for hist_hr in HISTORY_WINDOWS_HR
+            ) if fit is not None
+        ]
+        assert len(all_fits_data[k]) == len(fits)
+        num_fits += len(fits)
+
+        if fits:
+            mapopts, weights = np.array(fits).T
+            expected = np.sum(mapopts * weights) / np.sum(weights)
+            assert calc.mapopt_series[k] == pytest.approx(expected, rel=1e-8)
+        else:
+            assert np.isnan(calc.mapopt_series[k])
+
+    # The recording must exercise plenty of accepted fits
+    assert num_fits > 100
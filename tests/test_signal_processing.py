@@ -1 +1,94 @@
- 
+"""
+Tests for the signal processing module
+"""
+
+import numpy as np
+import pytest
+
+from mapopt_analysis.config import COX_WINDOWS_MIN, MIN_DATA_POINTS, MIN_CORRELATION_POINTS
+from mapopt_analysis.core.signal_processing import SignalProcessor
+
+
+def _reference_window(MAP, rSO2, lo, hi):
+    """Correlation and mean MAP of one window computed directly with np.corrcoef"""
+    x, y = MAP[lo:hi], rSO2[lo:hi]
+    complete = np.isfinite(x) & np.isfinite(y)
+
+    corr = np.nan
+    if hi - lo >= MIN_DATA_POINTS and complete.sum() >= MIN_CORRELATION_POINTS:
+        xc, yc = x[complete], y[complete]
+        if np.ptp(xc) > 0 and np.ptp(yc) > 0:
+            corr = np.corrcoef(xc, yc)[0, 1]
+
+    map_mean = np.mean(x) if np.all(np.isfinite(x)) else np.nan
+    return corr, map_mean
+
+
+@pytest.fixture
+def signals():
+    """Correlated MAP/rSO2 signals with scattered missing samples"""
+    rng = np.random.default_rng(42)
+    n = 600
+    MAP = 70 + 10 * np.sin(np.arange(n) / 25) + rng.normal(0, 2, n)
+    rSO2 = 60 + 0.4 * MAP + rng.normal(0, 3, n)
+    MAP[rng.choice(n, 15, replace=False)] = np.nan
+    rSO2[rng.choice(n, 15, replace=False)] = np.nan
+    return MAP, rSO2
+
+
+def test_windowed_correlations_match_corrcoef(signals):
+    MAP, rSO2 = signals
+    rng = np.random.default_rng(0)
+    lo = rng.integers(0, len(MAP) - 1, 500)
+    hi = np.minimum(lo + rng.integers(1, 80, 500), len(MAP))
+
+    corr, map_mean = SignalProcessor.windowed_correlations(
+        SignalProcessor.cumulative_sums(MAP, rSO2), lo, hi
+    )
+    expected = np.array([_reference_window(MAP, rSO2, a, b) for a, b in zip(lo, hi)])
+
+    np.testing.assert_allclose(corr, expected[:, 0], rtol=0, atol=1e-9)
+    np.testing.assert_allclose(map_mean, expected[:, 1], rtol=1e-12)
+
+
+def test_windowed_correlations_constant_signal_is_nan():
+    MAP = np.full(50, 80.0)
+    rSO2 = np.linspace(50, 70, 50)
+    corr, map_mean = SignalProcessor.windowed_correlations(
+        SignalProcessor.cumulative_sums(MAP, rSO2), [0], [50]
+    )
+    assert np.isnan(corr[0])
+    assert map_mean[0] == pytest.approx(80.0)
+
+
+def test_fisher_transform_round_trip():
+    r = np.linspace(-0.99, 0.99, 21)
+    np.testing.assert_allclose(
+        SignalProcessor.inverse_fisher_transform(SignalProcessor.fisher_transform(r)), r
+    )
+
+
+def test_cox_correlations_match_direct_windows(recording):
+    t, MAP, rSO2 = (recording[column].to_numpy() for column in ('time', 'MAP', 'rSO2'))
+
+    # Reference: each window of each COx size correlated on its own, then
+    # averaged over the windows sharing a centre time
+    by_time = {}
+    for cox_win_min in (w for w in COX_WINDOWS_MIN if w <= 30):
+        win_hr = cox_win_min / 60
+        for s in range(int((t[-1] - t[0] - win_hr) / (win_hr / 2)) + 1):
+            win_start = t[0] + s * win_hr / 2
+            win_end = win_start + win_hr
+            window = (t >= win_start) & (t < win_end)
+            corr, _ = _reference_window(MAP[window], rSO2[window], 0, window.sum())
+            if not np.isnan(corr):
+                by_time.setdefault((win_start + win_end) / 2, []).append(corr)
+    expected_time = np.array(sorted(by_time))
+
+    cox_time, cox_values = SignalProcessor.calculate_cox_correlations(recording)
+
+    assert len(expected_time) > 100
+    np.testing.assert_allclose(cox_time, expected_time, rtol=0, atol=1e-12)
+    np.testing.assert_allclose(
+        cox_values, [np.mean(by_time[c]) for c in expected_time], rtol=0, atol=1e-9
+    )